@@ -3,16 +3,29 @@ Classe base para subagentes temáticos.
 Define a interface comum e funcionalidades compartilhadas.
 """
 
+import atexit
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_openai import ChatOpenAI
 
 from app.config.agents import AgentConfig
+from app.config.http_clients import get_http_client
 from app.governance.logging import SessionContext
 from app.tools.databricks_tools import get_tools_for_theme
 
+# Clientes compartilhados por (modelo, temperatura) entre todos os subagentes
+_LLM_CACHE: dict[tuple[str, float], ChatOpenAI] = {}
+
+# Chamadas de ferramenta de um mesmo turno são I/O (round-trip ao Databricks):
+# pool único executa-as em paralelo em vez de somar as latências
+TOOL_MAX_WORKERS = max(1, int(os.environ.get("TOOL_MAX_WORKERS", "8")))
+_TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="agent-tools")
+atexit.register(_TOOL_EXECUTOR.shutdown, wait=False)
+
 
 class BaseAgent:
     """Classe base para todos os subagentes."""
@@ -24,26 +37,47 @@ class BaseAgent:
         model_name: str = "gpt-4o-mini",
     ):
         self.config = config
+        self._system_message = SystemMessage(content=config.system_prompt)
         self.session = session
         self.model_name = model_name
         self.tools = get_tools_for_theme(config.theme) if config.theme else []
         self._llm = None
+        self._llm_with_tools = None
+        self._tool_map = None
         self._agent = None
 
     @property
     def llm(self) -> ChatOpenAI:
         """Retorna instância do LLM lazy-loaded."""
         if self._llm is None:
-            self._llm = ChatOpenAI(
-                model=self.model_name,
-                temperature=0,
-            )
+            key = (self.model_name, 0.0)
+            if key not in _LLM_CACHE:
+                _LLM_CACHE[key] = ChatOpenAI(
+                    model=self.model_name,
+                    temperature=0,
+                    http_client=get_http_client(),
+                )
+            self._llm = _LLM_CACHE[key]
         return self._llm
 
+    @property
+    def llm_with_tools(self):
+        """LLM com as ferramentas do agente vinculadas (bind_tools feito uma vez)."""
+        if self._llm_with_tools is None:
+            self._llm_with_tools = self.llm.bind_tools(self.tools)
+        return self._llm_with_tools
+
+    @property
+    def tool_map(self) -> dict[str, Any]:
+        """Ferramentas do agente indexadas por nome."""
+        if self._tool_map is None:
+            self._tool_map = {tool.name: tool for tool in self.tools}
+        return self._tool_map
+
     def get_prompt(self) -> ChatPromptTemplate:
         """Retorna o prompt template do agente."""
         return ChatPromptTemplate.from_messages([
-            SystemMessage(content=self.config.system_prompt),
+            self._system_message,
             MessagesPlaceholder(variable_name="chat_history"),
             HumanMessage(content="{input}"),
             MessagesPlaceholder(variable_name="agent_scratchpad"),
@@ -71,14 +105,13 @@ class BaseAgent:
 
         try:
             if self.tools:
-                llm_with_tools = self.llm.bind_tools(self.tools)
                 messages = [
-                    SystemMessage(content=self.config.system_prompt),
+                    self._system_message,
                     *chat_history,
                     HumanMessage(content=query),
                 ]
 
-                response = llm_with_tools.invoke(messages)
+                response = self.llm_with_tools.invoke(messages)
 
                 if response.tool_calls:
                     tool_results = self._execute_tools(response.tool_calls)
@@ -92,7 +125,7 @@ class BaseAgent:
                     response_text = response.content
             else:
                 messages = [
-                    SystemMessage(content=self.config.system_prompt),
+                    self._system_message,
                     *chat_history,
                     HumanMessage(content=query),
                 ]
@@ -127,50 +160,59 @@ class BaseAgent:
                 "error": str(e),
             }
 
-    def _execute_tools(self, tool_calls: list) -> list:
+    def _run_tool(self, tool_call: dict[str, Any]) -> ToolMessage:
         """
-        Executa chamadas de ferramentas.
+        Executa uma única chamada de ferramenta.
 
         Args:
-            tool_calls: Lista de chamadas de ferramentas
+            tool_call: Chamada emitida pelo LLM
 
         Returns:
-            Lista de mensagens com resultados
+            Mensagem com o resultado (ou o erro) da ferramenta
         """
-        from langchain_core.messages import ToolMessage
+        tool_name = tool_call["name"]
+        tool_args = tool_call["args"]
+        tool_map = self.tool_map
+
+        if self.session:
+            self.session.log_tool_execution(tool_name, tool_args)
+
+        if tool_name in tool_map:
+            try:
+                tool_result = tool_map[tool_name].invoke(tool_args)
+                if self.session:
+                    self.session.log_tool_execution(
+                        tool_name,
+                        tool_args,
+                        str(tool_result)[:200],
+                    )
+            except Exception as e:
+                tool_result = f"Erro ao executar {tool_name}: {e}"
+        else:
+            tool_result = f"Ferramenta {tool_name} não encontrada"
+
+        return ToolMessage(
+            content=str(tool_result),
+            tool_call_id=tool_call["id"],
+        )
 
-        results = []
-        tool_map = {tool.name: tool for tool in self.tools}
+    def _execute_tools(self, tool_calls: list) -> list:
+        """
+        Executa chamadas de ferramentas.
 
-        for tool_call in tool_calls:
-            tool_name = tool_call["name"]
-            tool_args = tool_call["args"]
+        Várias chamadas no mesmo turno rodam em paralelo; a ordem das
+        mensagens de retorno segue a ordem de tool_calls.
 
-            if self.session:
-                self.session.log_tool_execution(tool_name, tool_args)
-
-            if tool_name in tool_map:
-                try:
-                    tool_result = tool_map[tool_name].invoke(tool_args)
-                    if self.session:
-                        self.session.log_tool_execution(
-                            tool_name,
-                            tool_args,
-                            str(tool_result)[:200],
-                        )
-                except Exception as e:
-                    tool_result = f"Erro ao executar {tool_name}: {e}"
-            else:
-                tool_result = f"Ferramenta {tool_name} não encontrada"
+        Args:
+            tool_calls: Lista de chamadas de ferramentas
 
-            results.append(
-                ToolMessage(
-                    content=str(tool_result),
-                    tool_call_id=tool_call["id"],
-                )
-            )
+        Returns:
+            Lista de mensagens com resultados
+        """
+        if len(tool_calls) <= 1:
+            return [self._run_tool(tool_call) for tool_call in tool_calls]
 
-        return results
+        return list(_TOOL_EXECUTOR.map(self._run_tool, tool_calls))
 
     def get_description(self) -> str:
         """Retorna descrição do agente."""
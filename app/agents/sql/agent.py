@@ -5,7 +5,7 @@ Capaz de explorar schemas, consultar tabelas e interpretar resultados.
 
 from typing import Any
 
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage
 
 from app.agents.base import BaseAgent
 from app.config.agents import AgentConfig
@@ -89,14 +89,13 @@ class SQLAgent(BaseAgent):
         chat_history = chat_history or []
 
         try:
-            llm_with_tools = self.llm.bind_tools(self.tools)
             messages = [
-                SystemMessage(content=self.config.system_prompt),
+                self._system_message,
                 *chat_history,
                 HumanMessage(content=query),
             ]
 
-            response = llm_with_tools.invoke(messages)
+            response = self.llm_with_tools.invoke(messages)
 
             if response.tool_calls:
                 tool_results = self._execute_tools(response.tool_calls)
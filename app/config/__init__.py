@@ -1,81 +1,56 @@
 """Configurações dos agentes e LLMs."""
 
-from app.config.agents import (
-    AMBIGUITY_RESOLVER_AGENT_CONFIG,
-    CADASTRO_AGENT_CONFIG,
-    CRITIC_AGENT_CONFIG,
-    FINANCEIRO_AGENT_CONFIG,
-    ORCHESTRATION_CONFIGS,
-    PLANNER_AGENT_CONFIG,
-    RENTABILIDADE_AGENT_CONFIG,
-    RESPONSE_AGENT_CONFIG,
-    THEME_CONFIGS,
-    VISUALIZATION_AGENT_CONFIG,
-    AgentConfig,
-    get_agent_config,
-    get_available_themes,
-    get_theme_config,
-    get_theme_descriptions,
-)
-from app.config.catalog_config import (
-    CatalogConfig,
-    ColumnMetadata,
-    DataDomain,
-    TableMetadata,
-    UnityCatalogRegistry,
-    get_catalog_registry,
-    get_domain_tables_context,
-    get_table_context_for_query,
-    register_table_metadata,
-)
-from app.config.llm import create_llm
-from app.config.models import (
-    DEFAULT_MODEL,
-    MODELS_REGISTRY,
-    ModelConfig,
-    ModelProvider,
-    ModelTask,
-    check_provider_available,
-    get_available_models,
-    get_model_config,
-    get_model_display_info,
-    get_models_by_provider,
-)
+import importlib
+from typing import Any
 
-__all__ = [
-    "AgentConfig",
-    "AMBIGUITY_RESOLVER_AGENT_CONFIG",
-    "CADASTRO_AGENT_CONFIG",
-    "FINANCEIRO_AGENT_CONFIG",
-    "RENTABILIDADE_AGENT_CONFIG",
-    "PLANNER_AGENT_CONFIG",
-    "CRITIC_AGENT_CONFIG",
-    "RESPONSE_AGENT_CONFIG",
-    "VISUALIZATION_AGENT_CONFIG",
-    "THEME_CONFIGS",
-    "ORCHESTRATION_CONFIGS",
-    "get_agent_config",
-    "get_theme_config",
-    "get_available_themes",
-    "get_theme_descriptions",
-    "MODELS_REGISTRY",
-    "DEFAULT_MODEL",
-    "ModelConfig",
-    "ModelProvider",
-    "ModelTask",
-    "check_provider_available",
-    "create_llm",
-    "get_available_models",
-    "get_model_config",
-    "get_model_display_info",
-    "get_models_by_provider",
-    "CatalogConfig",
-    "ColumnMetadata",
-    "DataDomain",
-    "TableMetadata",
-    "UnityCatalogRegistry",
-    "get_catalog_registry",
-    "get_domain_tables_context",
-    "get_table_context_for_query",
-    "register_table_metadata",
-]
+# Exportações carregadas sob demanda (PEP 562): importar um submódulo leve,
+# como app.config.models ou app.config.env, não carrega o LangChain de app.config.llm.
+_EXPORTS = {
+    "AgentConfig": "app.config.agents",
+    "AMBIGUITY_RESOLVER_AGENT_CONFIG": "app.config.agents",
+    "CADASTRO_AGENT_CONFIG": "app.config.agents",
+    "FINANCEIRO_AGENT_CONFIG": "app.config.agents",
+    "RENTABILIDADE_AGENT_CONFIG": "app.config.agents",
+    "PLANNER_AGENT_CONFIG": "app.config.agents",
+    "CRITIC_AGENT_CONFIG": "app.config.agents",
+    "RESPONSE_AGENT_CONFIG": "app.config.agents",
+    "VISUALIZATION_AGENT_CONFIG": "app.config.agents",
+    "THEME_CONFIGS": "app.config.agents",
+    "ORCHESTRATION_CONFIGS": "app.config.agents",
+    "get_agent_config": "app.config.agents",
+    "get_theme_config": "app.config.agents",
+    "get_available_themes": "app.config.agents",
+    "get_theme_descriptions": "app.config.agents",
+    "MODELS_REGISTRY": "app.config.models",
+    "DEFAULT_MODEL": "app.config.models",
+    "ModelConfig": "app.config.models",
+    "ModelProvider": "app.config.models",
+    "ModelTask": "app.config.models",
+    "check_provider_available": "app.config.models",
+    "create_llm": "app.config.llm",
+    "get_available_models": "app.config.models",
+    "get_model_config": "app.config.models",
+    "get_model_display_info": "app.config.models",
+    "get_models_by_provider": "app.config.models",
+    "get_models_grouped": "app.config.models",
+    "CatalogConfig": "app.config.catalog_config",
+    "ColumnMetadata": "app.config.catalog_config",
+    "DataDomain": "app.config.catalog_config",
+    "TableMetadata": "app.config.catalog_config",
+    "UnityCatalogRegistry": "app.config.catalog_config",
+    "get_catalog_registry": "app.config.catalog_config",
+    "get_domain_tables_context": "app.config.catalog_config",
+    "get_table_context_for_query": "app.config.catalog_config",
+    "register_table_metadata": "app.config.catalog_config",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
@@ -4,17 +4,20 @@ Implementa interface compatível com LangChain BaseChatModel.
 Inclui debugging detalhado em terminal para observabilidade.
 """
 
-import json
 import logging
 import traceback
 from collections.abc import Iterator
 from typing import Any
 
+import httpx
 from langchain_core.callbacks import CallbackManagerForLLMRun
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_core.outputs import ChatGeneration, ChatResult
 
+from app.config.http_clients import get_http_client
+from app.utils.serialization import dumps, loads
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -261,8 +264,6 @@ class ChatDatabricks(BaseChatModel):
         Returns:
             Resposta do endpoint
         """
-        import requests
-
         url = f"{self.host.rstrip('/')}/serving-endpoints/{self.endpoint}/invocations"
 
         headers = {
@@ -284,7 +285,14 @@ class ChatDatabricks(BaseChatModel):
         print(f"[DEBUG] Payload (without sensitive data): messages_count={len(messages)}, temperature={self.temperature}, max_tokens={self.max_tokens}")
 
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=120)
+            # Corpo serializado uma vez com orjson (quando disponível), já em UTF-8.
+            # Pool compartilhado: chamadas seguidas ao mesmo host reaproveitam a conexão TLS
+            response = get_http_client().post(
+                url,
+                headers=headers,
+                content=dumps(payload).encode("utf-8"),
+                timeout=120,
+            )
             print(f"[DEBUG] HTTP Status Code: {response.status_code}")
 
             if response.status_code != 200:
@@ -292,15 +300,15 @@ class ChatDatabricks(BaseChatModel):
 
             response.raise_for_status()
 
-            result = response.json()
-            print(f"[DEBUG] Raw response (truncated): {json.dumps(result)[:500]}...")
+            result = loads(response.content)
+            print(f"[DEBUG] Raw response (truncated): {response.text[:500]}...")
             return result
 
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             print(f"[DEBUG] HTTP Error: {e}")
-            print(f"[DEBUG] Response body: {e.response.text if e.response else 'N/A'}")
+            print(f"[DEBUG] Response body: {e.response.text}")
             raise
-        except requests.exceptions.RequestException as e:
+        except httpx.RequestError as e:
             print(f"[DEBUG] Request Error: {e}")
             raise
 
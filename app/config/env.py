@@ -0,0 +1,40 @@
+"""
+Variáveis de ambiente da plataforma.
+
+O .env é lido uma única vez por processo e as variáveis usadas pelos
+scripts de diagnóstico ficam em um objeto imutável.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+_ENV_VARS = ("DATABRICKS_HOST", "DATABRICKS_TOKEN", "OPENAI_API_KEY")
+
+_loaded = False
+
+
+def ensure_loaded() -> None:
+    """Carrega o .env na primeira chamada; as seguintes não fazem nada."""
+    global _loaded
+    if not _loaded:
+        load_dotenv()
+        _loaded = True
+
+
+@dataclass(frozen=True, slots=True)
+class Env:
+    """Credenciais lidas do ambiente."""
+
+    databricks_host: str | None
+    databricks_token: str | None
+    openai_api_key: str | None
+
+
+@lru_cache(maxsize=1)
+def env() -> Env:
+    """Retorna as variáveis de ambiente, lidas uma única vez."""
+    ensure_loaded()
+    return Env(**{name.lower(): os.environ.get(name) for name in _ENV_VARS})
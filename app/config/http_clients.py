@@ -0,0 +1,37 @@
+"""
+Clientes HTTP compartilhados pelos LLMs da plataforma.
+
+Um único pool síncrono por processo: chamadas paralelas reaproveitam
+conexões TCP/TLS já abertas em vez de abrir uma por cliente. Usa HTTP/2
+quando o pacote h2 está instalado.
+
+Não há cliente assíncrono compartilhado: cada process_query roda em um
+asyncio.run() próprio e conexões assíncronas ficam presas ao loop que as
+abriu; o langchain-openai já reaproveita o seu cliente assíncrono padrão.
+"""
+
+import importlib.util
+import logging
+from functools import cache
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# httpx só precisa do h2 instalado; o módulo não é usado diretamente
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+if not HTTP2_AVAILABLE:
+    logger.warning("h2 not installed. Shared LLM HTTP clients will use HTTP/1.1.")
+
+# Conexão falha rápido; leitura longa cobre respostas geradas por completo.
+# Sem limite de espera por slot do pool: a concorrência já é limitada acima.
+_TIMEOUT = httpx.Timeout(connect=10, read=60, write=60, pool=None)
+
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+
+@cache
+def get_http_client() -> httpx.Client:
+    """Retorna o cliente HTTP síncrono compartilhado."""
+    return httpx.Client(http2=HTTP2_AVAILABLE, limits=_LIMITS, timeout=_TIMEOUT)
+
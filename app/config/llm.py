@@ -68,6 +68,11 @@ def create_llm(
     if config.provider == ModelProvider.OPENAI:
         from langchain_openai import ChatOpenAI
 
+        from app.config.http_clients import get_http_client
+
+        # Pool de conexões único no processo, salvo se o chamador fornecer o seu
+        kwargs.setdefault("http_client", get_http_client())
+
         print(f"[DEBUG] Creating ChatOpenAI with model: {config.model_name}")
         return ChatOpenAI(
             model=config.model_name,
@@ -7,6 +7,7 @@ import logging
 import os
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import cache
 from typing import Any
 
 logger = logging.getLogger(__name__)
@@ -231,6 +232,24 @@ def get_models_by_provider(provider: ModelProvider) -> list[str]:
     ]
 
 
+@cache
+def get_models_grouped() -> dict[tuple[ModelProvider, ModelTask], list[tuple[str, ModelConfig]]]:
+    """
+    Agrupa os modelos habilitados por (provedor, tarefa) em uma única passada.
+
+    Returns:
+        Dicionário (provedor, tarefa) -> lista de (model_id, configuração),
+        na ordem do registry
+    """
+    grouped: dict[tuple[ModelProvider, ModelTask], list[tuple[str, ModelConfig]]] = {
+        (provider, task): [] for provider in ModelProvider for task in ModelTask
+    }
+    for model_id, config in MODELS_REGISTRY.items():
+        if config.enabled:
+            grouped[(config.provider, config.task)].append((model_id, config))
+    return grouped
+
+
 def get_models_by_task(task: ModelTask) -> list[str]:
     """Retorna lista de modelos por tipo de tarefa."""
     return [
@@ -3,12 +3,70 @@ Módulo de conexão com Databricks.
 Gerencia conexões com SQL Warehouse e Unity Catalog.
 """
 
+import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 from typing import Any
 
 from databricks import sql
 from databricks.sdk import WorkspaceClient
 
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    PYARROW_AVAILABLE = False
+    logger.warning("pyarrow not installed. SQL results will be fetched row by row.")
+
+
+# Schemas só mudam com DDL: reaproveitados por alguns minutos em memória
+SCHEMA_CACHE_TTL_SECONDS = int(os.getenv("SCHEMA_CACHE_TTL_SECONDS", "300"))
+SCHEMA_CACHE_MAX_ENTRIES = 512
+
+
+class _TTLCache:
+    """Cache LRU com TTL, seguro entre threads."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        """Retorna o valor se existir e não tiver expirado."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Armazena o valor, descartando o menos usado se cheio."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: str | None = None) -> None:
+        """Remove uma chave ou, sem chave, todo o conteúdo."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
 
 class DatabricksConnection:
     """Gerencia conexões com Databricks SQL Warehouse."""
@@ -21,6 +79,8 @@ class DatabricksConnection:
         self.schema = os.getenv("DATABRICKS_SCHEMA", "default")
         self._connection = None
         self._workspace_client = None
+        self._schema_cache = _TTLCache(SCHEMA_CACHE_TTL_SECONDS, SCHEMA_CACHE_MAX_ENTRIES)
+        self._metadata_cache = _TTLCache(SCHEMA_CACHE_TTL_SECONDS, SCHEMA_CACHE_MAX_ENTRIES)
 
     @property
     def connection(self):
@@ -43,19 +103,24 @@ class DatabricksConnection:
             )
         return self._workspace_client
 
-    def execute_query(self, query: str) -> list[dict[str, Any]]:
+    def execute_query(
+        self,
+        query: str,
+        params: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
         """
         Executa uma query SQL e retorna os resultados.
 
         Args:
             query: Query SQL a ser executada
+            params: Parâmetros nomeados (:nome) da query, enviados separados do texto SQL
 
         Returns:
             Lista de dicionários com os resultados
         """
         cursor = self.connection.cursor()
         try:
-            cursor.execute(query)
+            cursor.execute(query, params)
             columns = [desc[0] for desc in cursor.description]
             results = []
             for row in cursor.fetchall():
@@ -64,6 +129,28 @@ class DatabricksConnection:
         finally:
             cursor.close()
 
+    def execute_query_arrow(
+        self,
+        query: str,
+        params: dict[str, Any] | None = None,
+    ) -> "pa.Table":
+        """
+        Executa uma query SQL e retorna o resultado colunar (requer pyarrow).
+
+        Args:
+            query: Query SQL a ser executada
+            params: Parâmetros nomeados (:nome) da query
+
+        Returns:
+            Tabela Arrow com os resultados
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall_arrow()
+        finally:
+            cursor.close()
+
     def get_table_schema(self, table_name: str) -> list[dict[str, str]]:
         """
         Retorna o schema de uma tabela.
@@ -74,8 +161,42 @@ class DatabricksConnection:
         Returns:
             Lista com informações das colunas
         """
+        cached = self._schema_cache.get(table_name)
+        if cached is not None:
+            return cached
+
         query = f"DESCRIBE TABLE {table_name}"
-        return self.execute_query(query)
+        schema = self.execute_query(query)
+        self._schema_cache.set(table_name, schema)
+        return schema
+
+    def get_table_metadata(self, table_name: str) -> list[dict[str, Any]]:
+        """
+        Retorna os metadados estendidos de uma tabela (DESCRIBE EXTENDED).
+
+        Args:
+            table_name: Nome da tabela (catalog.schema.table)
+
+        Returns:
+            Lista com as linhas do DESCRIBE EXTENDED
+        """
+        cached = self._metadata_cache.get(table_name)
+        if cached is not None:
+            return cached
+
+        metadata = self.execute_query(f"DESCRIBE EXTENDED {table_name}")
+        self._metadata_cache.set(table_name, metadata)
+        return metadata
+
+    def invalidate_schema(self, table_name: str | None = None) -> None:
+        """
+        Descarta schema e metadados em cache (após DDL).
+
+        Args:
+            table_name: Tabela alterada; se omitido, limpa tudo
+        """
+        self._schema_cache.pop(table_name)
+        self._metadata_cache.pop(table_name)
 
     def get_sample_data(self, table_name: str, limit: int = 5) -> list[dict[str, Any]]:
         """
@@ -0,0 +1,17 @@
+"""Ferramentas de diagnóstico do pipeline multiagente."""
+
+from app.debug.harness import (
+    check_environment,
+    list_available_models,
+    print_result,
+    run_pipeline_test,
+    stream_pipeline,
+)
+
+__all__ = [
+    "check_environment",
+    "list_available_models",
+    "print_result",
+    "run_pipeline_test",
+    "stream_pipeline",
+]
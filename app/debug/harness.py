@@ -0,0 +1,295 @@
+"""
+Harness de diagnóstico do pipeline multiagente.
+
+Funções reutilizáveis do test_debug.py: verificação de ambiente, listagem
+de modelos e execução de perguntas de teste. Não encerram o processo nem
+leem argumentos de linha de comando; retornam False em caso de falha.
+"""
+
+import re
+import sys
+import traceback
+from dataclasses import fields
+from typing import TYPE_CHECKING
+
+from app.config.env import env
+
+if TYPE_CHECKING:
+    # Só para anotações: o grafo (LangGraph/LangChain) é importado sob demanda
+    from app.orchestration.graph import PipelineResult
+
+GENERIC_PHRASES = (
+    "forneça mais contexto",
+    "preciso de mais informações",
+    "não tenho dados suficientes",
+    "por favor, especifique",
+)
+
+# Todas as frases em uma única varredura da resposta
+_GENERIC_PHRASES_RE = re.compile("|".join(map(re.escape, GENERIC_PHRASES)))
+
+TEST_ACTIVE_DOMAINS = ["Cadastro", "Financeiro", "Rentabilidade"]
+
+TEST_GROUP_CONTEXT = {
+    "codigo_grupo": "TESTE001",
+    "nome_grupo": "Grupo de Teste",
+    "cnpj": "12.345.678/0001-90",
+    "razao_social": "Empresa Teste LTDA",
+}
+
+
+# Limites de saída: respostas descontroladas do LLM não inundam o terminal
+MAX_PRINT_CHARS = 16 * 1024
+MAX_STREAM_CHARS = 10 * 1024 * 1024
+REPORT_PREVIEW_CHARS = 1000
+
+# Moldura montada uma vez: cada título é uma única escrita no stdout
+_HEADER_TEMPLATE = "\n" + "=" * 70 + "\n {}\n" + "=" * 70 + "\n"
+_SECTION_TEMPLATE = "\n" + "-" * 50 + "\n {}\n" + "-" * 50 + "\n"
+
+
+def print_header(title: str) -> None:
+    sys.stdout.write(_HEADER_TEMPLATE.format(title))
+
+
+def print_section(title: str) -> None:
+    sys.stdout.write(_SECTION_TEMPLATE.format(title))
+
+
+def _truncated(text: str, limit: int = MAX_PRINT_CHARS) -> str:
+    """Corta o texto no limite, indicando quantos caracteres foram omitidos."""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [+{len(text) - limit} caracteres omitidos]"
+
+
+def check_environment() -> bool:
+    print_header("VERIFICAÇÃO DE AMBIENTE")
+
+    settings = env()
+    databricks_host = settings.databricks_host
+    databricks_token = settings.databricks_token
+    openai_key = settings.openai_api_key
+
+    print(f"DATABRICKS_HOST: {'configurado' if databricks_host else 'NÃO CONFIGURADO'}")
+    print(f"DATABRICKS_TOKEN: {'configurado' if databricks_token else 'NÃO CONFIGURADO'}")
+    print(f"OPENAI_API_KEY: {'configurado' if openai_key else 'NÃO CONFIGURADO'}")
+
+    if not databricks_host or not databricks_token:
+        print("\n[ERRO] Databricks não está configurado!")
+        print("[ERRO] Configure DATABRICKS_HOST e DATABRICKS_TOKEN no arquivo .env")
+        return False
+
+    return True
+
+
+def list_available_models() -> bool:
+    print_header("MODELOS DISPONÍVEIS")
+
+    try:
+        from app.config.models import ModelProvider, ModelTask, get_models_grouped
+
+        grouped = get_models_grouped()
+
+        # Listagem montada em uma lista e escrita de uma vez
+        lines: list[str] = ["\n--- MODELOS DATABRICKS (CHAT) ---\n"]
+        lines.extend(
+            f"  {model_id}\n    Display: {config.display_name}\n    Endpoint: {config.endpoint_name}\n\n"
+            for model_id, config in grouped[(ModelProvider.DATABRICKS, ModelTask.CHAT)]
+        )
+
+        lines.append("\n--- MODELOS DATABRICKS (EMBEDDING) ---\n")
+        lines.extend(
+            f"  {model_id}\n    Display: {config.display_name}\n    Endpoint: {config.endpoint_name}\n\n"
+            for model_id, config in grouped[(ModelProvider.DATABRICKS, ModelTask.EMBEDDING)]
+        )
+
+        lines.append("\n--- MODELOS OPENAI ---\n")
+        lines.extend(
+            f"  {model_id}\n    Display: {config.display_name}\n    Supports Tools: {config.supports_tools}\n\n"
+            for (provider, _), entries in grouped.items()
+            if provider == ModelProvider.OPENAI
+            for model_id, config in entries
+        )
+
+        sys.stdout.write("".join(lines))
+
+    except ImportError as e:
+        print(f"[ERRO] Falha ao importar módulos: {e}")
+        return False
+
+    return True
+
+
+def stream_pipeline(orchestrator, query: str) -> "PipelineResult":
+    # Etapas e tokens aparecem conforme o pipeline avança
+    result = None
+    streaming_response = False
+    streamed_chars = 0
+    for event in orchestrator.stream_query(
+        query=query,
+        active_domains=TEST_ACTIVE_DOMAINS,
+        group_context=TEST_GROUP_CONTEXT,
+        include_stages=True,
+    ):
+        if event["type"] == "token":
+            if not streaming_response:
+                print_section("RESPOSTA (STREAMING)")
+                streaming_response = True
+            if streamed_chars < MAX_STREAM_CHARS:
+                streamed_chars += len(event["content"])
+                sys.stdout.write(event["content"])
+                if streamed_chars >= MAX_STREAM_CHARS:
+                    sys.stdout.write("\n[AVISO] Limite de saída atingido; restante do streaming omitido\n")
+                sys.stdout.flush()
+        elif event["type"] == "stage":
+            streaming_response = False
+            print_section(f"ETAPA: {event['stage']}")
+            print(f"Campos atualizados: {list(event['update'].keys())}", flush=True)
+        else:
+            result = event["result"]
+
+    return result
+
+
+def print_result(result: "PipelineResult") -> None:
+    print_header("RESULTADO DO PIPELINE")
+
+    print(f"\nTipo do resultado: {type(result).__name__}")
+    print(f"Campos do resultado: {[f.name for f in fields(result)]}")
+    print(f"Pergunta normalizada: {result.normalized_query}")
+
+    print_section("RELATÓRIO CONSOLIDADO (final_report)")
+    final_report = result.final_report
+    print(f"Tamanho: {len(final_report)} caracteres")
+    if final_report:
+        print(f"\nConteúdo:\n{_truncated(final_report, REPORT_PREVIEW_CHARS)}")
+    else:
+        print("[AVISO] Relatório consolidado vazio!")
+
+    print_section("VALIDAÇÃO DO CRITIC")
+    validation = result.validation
+    print(f"is_valid: {validation.get('is_valid', 'N/A')}")
+    print(f"completeness_score: {validation.get('completeness_score', 'N/A')}")
+    print(f"summary: {validation.get('summary', 'N/A')}")
+    issues = validation.get("issues", [])
+    if issues:
+        print(f"issues: {issues}")
+
+    print_section("RESPOSTA FINAL")
+    response = result.response
+    print(f"Tamanho: {len(response)} caracteres")
+    if response:
+        print(f"\nConteúdo:\n{_truncated(response)}")
+    else:
+        print("[AVISO] Resposta final vazia!")
+
+    print_section("STATUS DA MEMÓRIA")
+    sys.stdout.write("".join(
+        f"  [{'OK' if value else 'X'}] {key}: {value}\n" for key, value in result.memory_status.items()
+    ))
+
+    print_section("FONTES CONSULTADAS")
+    if result.sources:
+        sys.stdout.write("".join(f"  - {source}\n" for source in result.sources))
+    else:
+        print("  Nenhuma fonte registrada")
+
+    print_section("VISUALIZAÇÃO")
+    print(f"Sugestão: {result.visualization_suggestion}")
+    print(f"Dados: {result.visualization_data}")
+
+    print_header("ANÁLISE DE QUALIDADE")
+
+    issues_found = []
+
+    if not final_report or len(final_report) < 50:
+        issues_found.append("Relatório consolidado vazio ou muito curto")
+
+    if not response or len(response) < 50:
+        issues_found.append("Resposta final vazia ou muito curta")
+
+    found_phrases = dict.fromkeys(_GENERIC_PHRASES_RE.findall(response.lower()))
+    issues_found.extend(f"Resposta contém frase genérica: '{phrase}'" for phrase in found_phrases)
+
+    if not validation.get("is_valid", True):
+        issues_found.append(f"Critic marcou como inválido: {validation.get('summary', '')}")
+
+    if issues_found:
+        print("\n[PROBLEMAS ENCONTRADOS]")
+        for issue in issues_found:
+            print(f"  - {issue}")
+    else:
+        print("\n[OK] Nenhum problema crítico encontrado")
+
+
+def run_pipeline_test(model_id: str | None, queries: list[str]) -> bool:
+    print_header("TESTE DO PIPELINE MULTIAGENTE")
+
+    try:
+        from app.config.models import DEFAULT_MODEL, get_model_config
+        from app.orchestration.graph import create_deep_orchestrator_instance
+
+        if not model_id:
+            model_id = DEFAULT_MODEL
+
+        print(f"\nModelo selecionado: {model_id}")
+
+        model_config = get_model_config(model_id)
+        if not model_config:
+            print(f"[ERRO] Modelo {model_id} não encontrado no registry!")
+            return False
+
+        print(f"Provider: {model_config.provider.value}")
+        print(f"Display name: {model_config.display_name}")
+        print(f"Endpoint: {model_config.endpoint_name or model_config.model_name}")
+        print(f"Task: {model_config.task.value}")
+        print(f"Supports tools: {model_config.supports_tools}")
+
+        print_section("CRIANDO ORQUESTRADOR")
+
+        orchestrator = create_deep_orchestrator_instance(
+            session=None,
+            user_id="test_debug_user",
+            model_id=model_id,
+            debug_mode=True,
+        )
+        print("Orquestrador criado com sucesso")
+
+        print_section("EXECUTANDO PERGUNTA DE TESTE")
+
+        for query in queries:
+            print(f"\nPergunta: '{query}'")
+        print("\nFluxo esperado:")
+        print("  1. Memory Recall")
+        print("  2. Ambiguity Resolver")
+        print("  3. Planner")
+        print("  4. Executor (Subagentes + ReportAgent)")
+        print("  5. Visualization (condicional)")
+        print("  6. Critic")
+        print("  7. Response")
+        print("  8. Memory Persist")
+
+        print_header("INICIANDO EXECUÇÃO DO PIPELINE")
+
+        if len(queries) == 1:
+            print_result(stream_pipeline(orchestrator, queries[0]))
+        else:
+            # Uma única instância do orquestrador atende todas as perguntas
+            results = orchestrator.process_batch(
+                queries,
+                active_domains=TEST_ACTIVE_DOMAINS,
+                group_context=TEST_GROUP_CONTEXT,
+            )
+            for query, result in zip(queries, results, strict=True):
+                print_header(f"PERGUNTA: {query}")
+                print_result(result)
+
+        print_header("TESTE CONCLUÍDO")
+
+    except Exception as e:
+        print(f"\n[ERRO] Falha durante execução: {e}")
+        print(f"\nStack trace:\n{traceback.format_exc()}")
+        return False
+
+    return True
@@ -184,13 +184,25 @@ def _process_prompt(prompt: str):
         orchestrator = st.session_state.orchestrator
         group_context = st.session_state.selected_group
 
-        result = orchestrator.process_query(
-            prompt,
-            ["cadastro", "financeiro", "rentabilidade"],
-            group_context=group_context,
-        )
+        # Tokens da resposta final aparecem enquanto são gerados
+        results = []
+
+        def stream_tokens():
+            for event in orchestrator.stream_query(
+                prompt,
+                ["cadastro", "financeiro", "rentabilidade"],
+                group_context=group_context,
+            ):
+                if event["type"] == "token":
+                    yield event["content"]
+                else:
+                    results.append(event["result"])
+
+        st.write_stream(stream_tokens())
+
+        result = results[-1] if results else None
 
-        raw_thoughts = result.get("agent_thoughts", []) or [result.get("reasoning", "Processando análise...")]
+        raw_thoughts = ["Processando análise..."]
 
         for thought in raw_thoughts:
             llm_thought += f"> {thought}\n\n"
@@ -204,8 +216,8 @@ def _process_prompt(prompt: str):
         status.update(label="Análise finalizada!", state="complete", expanded=False)
 
     duration = round(time.time() - start_time, 2)
-    response_text = result.get("response", "Não foi possível processar a pergunta.")
-    analysis = result.get("analysis", {"category": "Financeiro", "complexity": "Simples"})
+    response_text = result.response if result else "Não foi possível processar a pergunta."
+    analysis = {"category": "Financeiro", "complexity": "Simples"}
 
     message_data = {
         "role": "assistant",
@@ -213,19 +225,19 @@ def _process_prompt(prompt: str):
         "timestamp": datetime.datetime.now().strftime("%H:%M"),
         "analysis": analysis,
         "execution_time": str(duration),
-        "plan": result.get("plan", []),
-        "sources": result.get("sources", []),
-        "subagent_responses": result.get("subagent_responses", []),
-        "visualization_data": result.get("visualization_data"),
-        "ambiguity_result": result.get("ambiguity_result", {}),
+        "plan": [],
+        "sources": result.sources if result else [],
+        "subagent_responses": [],
+        "visualization_data": result.visualization_data if result else None,
+        "ambiguity_result": {},
         "execution_logs": execution_logs,
         "thought": llm_thought,
     }
 
     st.session_state.chat_history.append(message_data)
 
-    if "memory_status" in result:
-        st.session_state.memory_status = result["memory_status"]
+    if result:
+        st.session_state.memory_status = result.memory_status
 
     st.rerun()
 
@@ -3,10 +3,14 @@ Módulo de governança e observabilidade.
 Implementa logging estruturado, geração de session_id e integração com LangSmith.
 """
 
+import atexit
+import hashlib
 import logging
 import os
+import queue
 import uuid
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 
 LANGSMITH_ENABLED = os.getenv("LANGSMITH_API_KEY") is not None
@@ -33,7 +37,14 @@ def setup_logging(level: int = logging.INFO) -> logging.Logger:
             datefmt="%Y-%m-%d %H:%M:%S",
         )
         handler.setFormatter(formatter)
-        logger.addHandler(handler)
+
+        # Escrita do log em thread própria: log_plan/log_response não bloqueiam
+        # o caminho da resposta com I/O do handler
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(QueueHandler(log_queue))
 
     return logger
 
@@ -47,6 +58,30 @@ class SessionContext:
         self.created_at = datetime.now()
         self.events: list[dict[str, Any]] = []
         self.logger = setup_logging()
+        self._answered_steps: dict[str, dict[str, Any]] = {}
+
+    @staticmethod
+    def _step_key(domain: str, task: str) -> str:
+        """Chave do passo: domínio e tarefa normalizada (caixa e espaços)."""
+        normalized_task = " ".join(task.lower().split())
+        return hashlib.sha256(f"{domain.lower()}|{normalized_task}".encode()).hexdigest()
+
+    def get_answered_step(self, domain: str, task: str) -> dict[str, Any] | None:
+        """
+        Retorna o resultado de um passo já respondido nesta sessão.
+
+        Args:
+            domain: Domínio do subagente
+            task: Tarefa executada
+
+        Returns:
+            Resultado registrado ou None
+        """
+        return self._answered_steps.get(self._step_key(domain, task))
+
+    def record_answered_step(self, domain: str, task: str, result: dict[str, Any]) -> None:
+        """Registra o resultado bem-sucedido de um passo para reuso na sessão."""
+        self._answered_steps[self._step_key(domain, task)] = result
 
     def log_event(
         self,
@@ -83,8 +118,8 @@ class SessionContext:
             {"query": query, "theme": theme},
         )
 
-    def log_plan(self, plan: list[str]) -> None:
-        """Registra o plano de execução."""
+    def log_plan(self, plan: list[dict[str, Any]]) -> None:
+        """Registra o plano de execução (os passos são guardados por referência, sem cópia)."""
         self.log_event(
             "execution_plan",
             f"Plano criado com {len(plan)} etapas",
@@ -1,11 +1,18 @@
 """
 Memória de Longo Prazo (Long-Term Memory).
-Implementa Vector Store com FAISS para persistência semântica.
+Implementa Vector Store com usearch para persistência semântica.
 Baseada em identidade (matrícula), indexável e auditável.
+
+Gravações, persistência e buscas no índice de uma instância são serializadas
+por um lock: a mesma memória é usada por várias requisições concorrentes.
+
+O índice HNSW usa métrica de cosseno com quantização int8 e é salvo em um
+único arquivo por usuário, mapeado em memória (mmap) na recarga.
 """
 
 import json
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
 
@@ -20,7 +27,7 @@ MEMORY_FILE = MEMORY_DIR / "long_term_memory.json"
 class LongTermMemory:
     """
     Gerenciador de memória de longo prazo.
-    Usa FAISS para busca semântica e JSON para persistência de metadados.
+    Usa usearch para busca semântica e JSON para persistência de metadados.
     """
 
     def __init__(self, user_id: str | None = None):
@@ -33,8 +40,11 @@ class LongTermMemory:
         self.user_id = user_id
         self._entries: list[MemoryEntry] = []
         self._embeddings: list[list[float]] = []
-        self._faiss_index = None
+        self._index = None
+        self._index_is_view = False
         self._embedding_model = None
+        # Reentrante: add_many -> _save_to_disk/_index_entries -> _build_index
+        self._lock = threading.RLock()
 
         self._ensure_storage_dir()
         self._load_from_disk()
@@ -67,17 +77,20 @@ class LongTermMemory:
                 logger.error(f"Error loading memory: {e}")
                 self._entries = []
 
+        self._load_index()
+
     def _save_to_disk(self):
         """Salva memórias no disco."""
         file_path = self._get_user_file()
         try:
-            data = {
-                "user_id": self.user_id,
-                "last_updated": datetime.now().isoformat(),
-                "entries": [entry.to_dict() for entry in self._entries],
-            }
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with self._lock:
+                data = {
+                    "user_id": self.user_id,
+                    "last_updated": datetime.now().isoformat(),
+                    "entries": [entry.to_dict() for entry in self._entries],
+                }
+                with open(file_path, "w") as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
             logger.info(f"Saved {len(self._entries)} memories for user {self.user_id}")
         except OSError as e:
             logger.error(f"Error saving memory: {e}")
@@ -98,6 +111,25 @@ class LongTermMemory:
             logger.warning(f"Could not generate embedding: {e}")
             return self._simple_embedding(text)
 
+    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """
+        Gera embeddings para vários textos em uma única chamada ao modelo.
+        Usa o mesmo fallback de _get_embedding em caso de erro.
+        """
+        if not texts:
+            return []
+
+        try:
+            from langchain_openai import OpenAIEmbeddings
+
+            if self._embedding_model is None:
+                self._embedding_model = OpenAIEmbeddings(model="text-embedding-3-small")
+
+            return self._embedding_model.embed_documents(texts)
+        except Exception as e:
+            logger.warning(f"Could not generate embeddings: {e}")
+            return [self._simple_embedding(text) for text in texts]
+
     def _simple_embedding(self, text: str) -> list[float]:
         """Fallback: embedding simples baseado em hash."""
         import hashlib
@@ -105,29 +137,90 @@ class LongTermMemory:
         hash_bytes = hashlib.sha256(text.encode()).digest()
         return [float(b) / 255.0 for b in hash_bytes[:128]]
 
-    def _build_faiss_index(self):
-        """Constrói o índice FAISS para busca semântica."""
+    def _get_index_file(self) -> Path:
+        """Retorna o arquivo do índice vetorial do usuário."""
+        return self._get_user_file().with_suffix(".usearch")
+
+    def _load_index(self):
+        """Mapeia o índice persistido em disco (zero-copy via mmap)."""
+        index_path = self._get_index_file()
+        if not self._entries or not index_path.exists():
+            return
+
+        try:
+            from usearch.index import Index
+
+            index = Index.restore(str(index_path), view=True)
+            if index is None or len(index) != len(self._entries):
+                logger.warning("Persisted usearch index is stale, it will be rebuilt")
+                return
+
+            self._index = index
+            self._index_is_view = True
+            logger.info(f"Mapped usearch index with {len(index)} entries")
+        except ImportError:
+            logger.warning("usearch not available, using simple search")
+        except Exception as e:
+            logger.warning(f"Could not load usearch index: {e}")
+
+    def _save_index(self):
+        """Persiste o índice vetorial em disco."""
+        if self._index is None:
+            return
+        try:
+            self._index.save(str(self._get_index_file()))
+        except Exception as e:
+            logger.error(f"Error saving usearch index: {e}")
+
+    def _build_index(self):
+        """Constrói o índice usearch (HNSW, cosseno, quantização int8)."""
         if not self._entries:
             return
 
         try:
-            import faiss
             import numpy as np
-
-            if not self._embeddings:
-                self._embeddings = [
-                    self._get_embedding(entry.conteudo) for entry in self._entries
-                ]
-
-            if self._embeddings:
-                dimension = len(self._embeddings[0])
-                self._faiss_index = faiss.IndexFlatL2(dimension)
-                embeddings_array = np.array(self._embeddings).astype("float32")
-                self._faiss_index.add(embeddings_array)
-                logger.info(f"Built FAISS index with {len(self._entries)} entries")
+            from usearch.index import Index
+
+            if len(self._embeddings) != len(self._entries):
+                self._embeddings = self.get_embeddings(
+                    [entry.conteudo for entry in self._entries]
+                )
+
+            embeddings_array = np.array(self._embeddings, dtype=np.float32)
+            self._index = Index(ndim=embeddings_array.shape[1], metric="cos", dtype="i8")
+            self._index.add(
+                keys=np.arange(len(self._entries), dtype=np.uint64),
+                vectors=embeddings_array,
+            )
+            self._index_is_view = False
+            self._save_index()
+            logger.info(f"Built usearch index with {len(self._entries)} entries")
         except ImportError:
-            logger.warning("FAISS not available, using simple search")
-            self._faiss_index = None
+            logger.warning("usearch not available, using simple search")
+            self._index = None
+
+    def _index_entries(self, first_key: int, embeddings: list[list[float]]):
+        """Insere entradas no índice existente, sem reconstruí-lo."""
+        if self._index is None:
+            self._build_index()
+            return
+
+        import numpy as np
+
+        try:
+            with self._lock:
+                if self._index_is_view:
+                    self._index.load(str(self._get_index_file()))
+                    self._index_is_view = False
+
+                self._index.add(
+                    keys=np.arange(first_key, first_key + len(embeddings), dtype=np.uint64),
+                    vectors=np.array(embeddings, dtype=np.float32),
+                )
+                self._save_index()
+        except Exception as e:
+            logger.warning(f"Could not update usearch index: {e}")
+            self._index = None
 
     def add(self, entry: MemoryEntry) -> str:
         """
@@ -139,22 +232,64 @@ class LongTermMemory:
         Returns:
             ID do embedding
         """
-        entry.user_id = self.user_id or entry.user_id
-        entry.embedding_id = f"mem_{len(self._entries)}_{datetime.now().timestamp()}"
+        embedding = self._get_embedding(entry.conteudo)
+        return self.add_many([entry], [embedding])[0]
+
+    def add_many(
+        self,
+        entries: list[MemoryEntry],
+        embeddings: list[list[float]] | None = None,
+    ) -> list[str]:
+        """
+        Adiciona várias entradas com uma única escrita em disco
+        e uma única inserção no índice.
 
-        self._entries.append(entry)
+        Args:
+            entries: Entradas de memória
+            embeddings: Embeddings já calculados (gerados em lote se omitidos)
 
-        embedding = self._get_embedding(entry.conteudo)
-        self._embeddings.append(embedding)
+        Returns:
+            IDs dos embeddings, na ordem das entradas
+        """
+        if not entries:
+            return []
+
+        if embeddings is None:
+            embeddings = self.get_embeddings([entry.conteudo for entry in entries])
 
-        self._save_to_disk()
-        self._build_faiss_index()
+        # Chaves do índice = posições em _entries: reservadas e inseridas sob o lock
+        with self._lock:
+            first_key = len(self._entries)
+            timestamp = datetime.now().timestamp()
+            for offset, entry in enumerate(entries):
+                entry.user_id = self.user_id or entry.user_id
+                entry.embedding_id = f"mem_{first_key + offset}_{timestamp}"
 
-        logger.info(
-            f"Added memory: type={entry.tipo.value}, domain={entry.dominio}"
-        )
+            self._entries.extend(entries)
+            self._embeddings.extend(embeddings)
+
+            self._save_to_disk()
+            self._index_entries(first_key, embeddings)
+
+        for entry in entries:
+            logger.info(
+                f"Added memory: type={entry.tipo.value}, domain={entry.dominio}"
+            )
 
-        return entry.embedding_id
+        return [entry.embedding_id for entry in entries]
+
+    def _filter_entries(
+        self,
+        tipo: MemoryType | None,
+        dominio: str | None,
+    ) -> list[MemoryEntry]:
+        """Aplica os filtros de tipo e domínio."""
+        filtered_entries = self._entries
+        if tipo:
+            filtered_entries = [e for e in filtered_entries if e.tipo == tipo]
+        if dominio:
+            filtered_entries = [e for e in filtered_entries if e.dominio == dominio]
+        return filtered_entries
 
     def search(
         self,
@@ -175,48 +310,103 @@ class LongTermMemory:
         Returns:
             Lista de entradas de memória relevantes
         """
-        if not self._entries:
-            return []
-
-        filtered_entries = self._entries
-        if tipo:
-            filtered_entries = [e for e in filtered_entries if e.tipo == tipo]
-        if dominio:
-            filtered_entries = [e for e in filtered_entries if e.dominio == dominio]
-
+        with self._lock:
+            filtered_entries = self._filter_entries(tipo, dominio) if self._entries else []
+            has_index = self._index is not None
         if not filtered_entries:
             return []
 
         try:
-            if self._faiss_index is not None:
-                return self._faiss_search(query, filtered_entries, limit)
+            if has_index:
+                # Embedding fora do lock: a chamada de rede não bloqueia gravações
+                query_embedding = self._get_embedding(query)
+                with self._lock:
+                    if self._index is not None:
+                        return self._vector_search(
+                            [query_embedding], self._filter_entries(tipo, dominio), limit
+                        )[0]
         except Exception as e:
-            logger.warning(f"FAISS search failed: {e}")
+            logger.warning(f"Vector search failed: {e}")
 
         return self._simple_search(query, filtered_entries, limit)
 
-    def _faiss_search(
-        self, query: str, entries: list[MemoryEntry], limit: int
-    ) -> list[MemoryEntry]:
-        """Busca usando FAISS."""
-        import numpy as np
+    def search_many(
+        self,
+        queries: list[str],
+        limit: int = 5,
+        tipo: MemoryType | None = None,
+        dominio: str | None = None,
+        query_embeddings: list[list[float]] | None = None,
+    ) -> list[list[MemoryEntry]]:
+        """
+        Busca várias consultas com uma única chamada de embeddings
+        e uma única busca em lote no índice.
 
-        query_embedding = np.array([self._get_embedding(query)]).astype("float32")
+        Args:
+            queries: Textos de busca
+            limit: Número máximo de resultados por consulta
+            tipo: Filtrar por tipo de memória
+            dominio: Filtrar por domínio
+            query_embeddings: Embeddings já calculados das consultas
+
+        Returns:
+            Lista de resultados, na ordem das consultas
+        """
+        if not queries:
+            return []
 
-        entry_indices = [self._entries.index(e) for e in entries]
-        entry_embeddings = np.array(
-            [self._embeddings[i] for i in entry_indices]
-        ).astype("float32")
+        with self._lock:
+            filtered_entries = self._filter_entries(tipo, dominio) if self._entries else []
+            has_index = self._index is not None
+        if not filtered_entries:
+            return [[] for _ in queries]
 
-        import faiss
+        try:
+            if has_index:
+                if query_embeddings is None:
+                    query_embeddings = self.get_embeddings(queries)
+                with self._lock:
+                    if self._index is not None:
+                        return self._vector_search(
+                            query_embeddings, self._filter_entries(tipo, dominio), limit
+                        )
+        except Exception as e:
+            logger.warning(f"Vector search failed: {e}")
 
-        temp_index = faiss.IndexFlatL2(entry_embeddings.shape[1])
-        temp_index.add(entry_embeddings)
+        return [self._simple_search(query, filtered_entries, limit) for query in queries]
 
-        k = min(limit, len(entries))
-        _, indices = temp_index.search(query_embedding, k)
+    def _vector_search(
+        self,
+        query_embeddings: list[list[float]],
+        entries: list[MemoryEntry],
+        limit: int,
+    ) -> list[list[MemoryEntry]]:
+        """Busca em lote no índice usearch, restrita às entradas filtradas."""
+        import numpy as np
 
-        return [entries[i] for i in indices[0] if i < len(entries)]
+        allowed = {id(e) for e in entries}
+        count = limit if len(entries) == len(self._entries) else len(self._entries)
+        matches = self._index.search(np.array(query_embeddings, dtype=np.float32), count)
+
+        if len(query_embeddings) == 1:
+            rows = [matches.keys]
+        else:
+            rows = [
+                keys[:found]
+                for keys, found in zip(matches.keys, matches.counts, strict=True)
+            ]
+
+        results: list[list[MemoryEntry]] = []
+        for keys in rows:
+            row: list[MemoryEntry] = []
+            for key in keys:
+                entry = self._entries[int(key)]
+                if id(entry) in allowed:
+                    row.append(entry)
+                    if len(row) == limit:
+                        break
+            results.append(row)
+        return results
 
     def _simple_search(
         self, query: str, entries: list[MemoryEntry], limit: int
@@ -262,10 +452,13 @@ class LongTermMemory:
 
     def clear(self):
         """Limpa todas as memórias (use com cuidado)."""
-        self._entries = []
-        self._embeddings = []
-        self._faiss_index = None
-        self._save_to_disk()
+        with self._lock:
+            self._entries = []
+            self._embeddings = []
+            self._index = None
+            self._index_is_view = False
+            self._get_index_file().unlink(missing_ok=True)
+            self._save_to_disk()
         logger.warning(f"Cleared all memories for user {self.user_id}")
 
 
@@ -4,7 +4,13 @@ Responsável por decidir o que entra na memória longa,
 quando consultar, resolver conflitos e versionar entradas.
 """
 
+import hashlib
+import json
 import logging
+import math
+import re
+import time
+from collections import deque
 from datetime import datetime
 from typing import Any
 
@@ -13,6 +19,21 @@ from app.memory.models import MemoryEntry, MemoryType
 
 logger = logging.getLogger(__name__)
 
+_SENSITIVE_RE = re.compile(
+    r"senha|password|token|secret|api_key|cpf|rg|cartao|credit_card",
+    re.IGNORECASE,
+)
+_SQL_RE = re.compile(r"\b(select|insert|update|delete|from)\s", re.IGNORECASE)
+
+LOG_MAXLEN = 1000
+
+AMBIGUITY_CACHE_THRESHOLD = 0.95
+AMBIGUITY_CACHE_MAXLEN = 256
+
+# Os passos do plano citam entidades da pergunta: limiar tão estrito quanto o de ambiguidade
+PLAN_CACHE_THRESHOLD = 0.95
+PLAN_CACHE_MAXLEN = 256
+
 
 class MemoryAgent:
     """
@@ -30,8 +51,17 @@ class MemoryAgent:
         """
         self.user_id = user_id
         self.long_term = get_long_term_memory(user_id)
-        self._write_log: list[dict[str, Any]] = []
-        self._read_log: list[dict[str, Any]] = []
+        self._write_log: deque[dict[str, Any]] = deque(maxlen=LOG_MAXLEN)
+        self._read_log: deque[dict[str, Any]] = deque(maxlen=LOG_MAXLEN)
+        self._write_count = 0
+        self._read_count = 0
+        self._ambiguity_cache: deque[tuple[str, list[float], dict[str, Any]]] = deque(
+            maxlen=AMBIGUITY_CACHE_MAXLEN
+        )
+        self._plan_cache: deque[tuple[str, list[float], dict[str, Any]]] = deque(
+            maxlen=PLAN_CACHE_MAXLEN
+        )
+        self._last_query_embedding: tuple[str, list[float]] | None = None
 
     def should_memorize(
         self,
@@ -60,19 +90,12 @@ class MemoryAgent:
         if not content or len(content.strip()) < 10:
             return False
 
-        content_lower = content.lower()
-
-        sensitive_patterns = [
-            "senha", "password", "token", "secret", "api_key",
-            "cpf", "rg", "cartao", "credit_card",
-        ]
-        for pattern in sensitive_patterns:
-            if pattern in content_lower:
-                logger.info(f"Blocked sensitive content: {pattern}")
-                return False
+        sensitive_match = _SENSITIVE_RE.search(content)
+        if sensitive_match:
+            logger.info(f"Blocked sensitive content: {sensitive_match.group(0).lower()}")
+            return False
 
-        sql_patterns = ["select ", "insert ", "update ", "delete ", "from "]
-        sql_count = sum(1 for p in sql_patterns if p in content_lower)
+        sql_count = len({keyword.lower() for keyword in _SQL_RE.findall(content)})
         if sql_count >= 2:
             logger.info("Blocked SQL content")
             return False
@@ -135,6 +158,86 @@ class MemoryAgent:
 
         return embedding_id
 
+    def memorize_many(
+        self,
+        items: list[tuple[str, MemoryType, str | None, dict[str, Any] | None]],
+    ) -> list[str | None]:
+        """
+        Memoriza um lote de conteúdos.
+        Gera os embeddings em uma única chamada e detecta duplicatas
+        com uma busca em lote por (tipo, domínio).
+
+        Args:
+            items: Tuplas (content, tipo, dominio, metadata)
+
+        Returns:
+            ID do embedding de cada item, ou None se não memorizado
+        """
+        results: list[str | None] = [None] * len(items)
+
+        candidates = [
+            i for i, (content, tipo, _, _) in enumerate(items)
+            if self.should_memorize(content, tipo)
+        ]
+        if not candidates:
+            logger.info("Content not memorized: failed rules check")
+            return results
+
+        embeddings = self.long_term.get_embeddings([items[i][0] for i in candidates])
+
+        groups: dict[tuple[MemoryType, str | None], list[int]] = {}
+        for position, i in enumerate(candidates):
+            _, tipo, dominio, _ = items[i]
+            groups.setdefault((tipo, dominio), []).append(position)
+
+        assigned: list[tuple[int, MemoryEntry]] = []
+        new_entries: list[MemoryEntry] = []
+        new_embeddings: list[list[float]] = []
+
+        for (tipo, dominio), positions in groups.items():
+            contents = [items[candidates[p]][0] for p in positions]
+            matches = self.long_term.search_many(
+                contents,
+                limit=3,
+                tipo=tipo,
+                dominio=dominio,
+                query_embeddings=[embeddings[p] for p in positions],
+            )
+
+            pending: list[MemoryEntry] = []
+            for position, content, existing in zip(positions, contents, matches, strict=True):
+                item_index = candidates[position]
+
+                duplicate = self._find_similar(content, existing + pending)
+                if duplicate:
+                    if duplicate.embedding_id:
+                        logger.info(f"Content already exists: {duplicate.embedding_id}")
+                    assigned.append((item_index, duplicate))
+                    continue
+
+                entry = MemoryEntry(
+                    user_id=self.user_id,
+                    tipo=tipo,
+                    conteudo=content,
+                    dominio=dominio,
+                    timestamp=datetime.now(),
+                    metadata=items[item_index][3] or {},
+                )
+                pending.append(entry)
+                new_entries.append(entry)
+                new_embeddings.append(embeddings[position])
+                assigned.append((item_index, entry))
+
+        self.long_term.add_many(new_entries, new_embeddings)
+
+        for entry in new_entries:
+            self._log_write(entry, "created")
+
+        for item_index, entry in assigned:
+            results[item_index] = entry.embedding_id
+
+        return results
+
     def _check_duplicate(
         self,
         content: str,
@@ -143,8 +246,15 @@ class MemoryAgent:
     ) -> MemoryEntry | None:
         """Verifica se já existe memória similar."""
         existing = self.long_term.search(content, limit=3, tipo=tipo, dominio=dominio)
+        return self._find_similar(content, existing)
 
-        for entry in existing:
+    def _find_similar(
+        self,
+        content: str,
+        entries: list[MemoryEntry],
+    ) -> MemoryEntry | None:
+        """Retorna a primeira entrada com similaridade acima do limiar."""
+        for entry in entries:
             similarity = self._calculate_similarity(content, entry.conteudo)
             if similarity > 0.9:
                 return entry
@@ -211,6 +321,171 @@ class MemoryAgent:
             dominio=dominio,
         )
 
+    @staticmethod
+    def _ambiguity_context_key(
+        active_domains: list[str] | None,
+        group_context: dict[str, Any] | None,
+    ) -> str:
+        """Hash do contexto; evita reaproveitar resoluções de outro contexto."""
+        raw = json.dumps(
+            {"domains": sorted(active_domains or []), "group": group_context or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _embed_query(self, query: str) -> list[float]:
+        """Gera o embedding da pergunta, reaproveitando o último calculado."""
+        if self._last_query_embedding and self._last_query_embedding[0] == query:
+            return self._last_query_embedding[1]
+
+        embedding = self.long_term.get_embeddings([query])[0]
+        self._last_query_embedding = (query, embedding)
+        return embedding
+
+    @staticmethod
+    def _cosine_similarity(a: list[float], b: list[float]) -> float:
+        """Similaridade de cosseno entre dois vetores."""
+        if len(a) != len(b):
+            return 0.0
+
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        if norm == 0:
+            return 0.0
+
+        return sum(x * y for x, y in zip(a, b, strict=True)) / norm
+
+    def _semantic_lookup(
+        self,
+        cache: deque[tuple[str, list[float], dict[str, Any]]],
+        threshold: float,
+        query: str,
+        active_domains: list[str] | None,
+        group_context: dict[str, Any] | None,
+    ) -> tuple[dict[str, Any], float] | None:
+        """Retorna (resultado, similaridade) mais próximo no mesmo contexto, acima do limiar."""
+        if not cache:
+            return None
+
+        context_key = self._ambiguity_context_key(active_domains, group_context)
+        embedding = self._embed_query(query)
+
+        best: dict[str, Any] | None = None
+        best_score = threshold
+        for key, cached_embedding, result in cache:
+            if key != context_key:
+                continue
+            score = self._cosine_similarity(embedding, cached_embedding)
+            if score >= best_score:
+                best, best_score = result, score
+
+        return (best, best_score) if best is not None else None
+
+    def get_cached_ambiguity(
+        self,
+        query: str,
+        active_domains: list[str] | None = None,
+        group_context: dict[str, Any] | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Busca uma resolução de ambiguidade para pergunta semanticamente igual.
+
+        Args:
+            query: Pergunta original do usuário
+            active_domains: Domínios ativos
+            group_context: Contexto do grupo
+
+        Returns:
+            Resultado de ambiguidade em cache ou None
+        """
+        best = self._semantic_lookup(
+            self._ambiguity_cache,
+            AMBIGUITY_CACHE_THRESHOLD,
+            query,
+            active_domains,
+            group_context,
+        )
+        if best is not None:
+            logger.info(f"Ambiguity cache hit (similarity={best[1]:.3f})")
+            return best[0]
+
+        return None
+
+    def cache_ambiguity(
+        self,
+        query: str,
+        result: dict[str, Any],
+        active_domains: list[str] | None = None,
+        group_context: dict[str, Any] | None = None,
+    ) -> None:
+        """
+        Armazena o resultado do resolvedor de ambiguidade para a pergunta.
+
+        Args:
+            query: Pergunta original do usuário
+            result: Resultado do resolvedor
+            active_domains: Domínios ativos
+            group_context: Contexto do grupo
+        """
+        self._ambiguity_cache.append((
+            self._ambiguity_context_key(active_domains, group_context),
+            self._embed_query(query),
+            result,
+        ))
+
+    def get_cached_plan(
+        self,
+        query: str,
+        active_domains: list[str] | None = None,
+        group_context: dict[str, Any] | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Busca um plano gerado para pergunta normalizada semanticamente igual.
+
+        Args:
+            query: Pergunta normalizada
+            active_domains: Domínios ativos
+            group_context: Contexto do grupo
+
+        Returns:
+            Plano em cache ou None
+        """
+        best = self._semantic_lookup(
+            self._plan_cache,
+            PLAN_CACHE_THRESHOLD,
+            query,
+            active_domains,
+            group_context,
+        )
+        if best is not None:
+            logger.info(f"Plan cache hit (similarity={best[1]:.3f})")
+            return best[0]
+
+        return None
+
+    def cache_plan(
+        self,
+        query: str,
+        plan: dict[str, Any],
+        active_domains: list[str] | None = None,
+        group_context: dict[str, Any] | None = None,
+    ) -> None:
+        """
+        Armazena o plano gerado para a pergunta normalizada.
+
+        Args:
+            query: Pergunta normalizada
+            plan: Plano retornado pelo planner
+            active_domains: Domínios ativos
+            group_context: Contexto do grupo
+        """
+        self._plan_cache.append((
+            self._ambiguity_context_key(active_domains, group_context),
+            self._embed_query(query),
+            plan,
+        ))
+
     def recall_user_preferences(self) -> list[MemoryEntry]:
         """Recupera preferências do usuário."""
         return self.long_term.get_user_preferences()
@@ -244,6 +519,29 @@ class MemoryAgent:
             metadata={"term": term, "resolution": resolution},
         )
 
+    def memorize_ambiguity_resolutions(
+        self,
+        resolutions: list[tuple[str, str, str | None]],
+    ) -> list[str | None]:
+        """
+        Memoriza várias resoluções de ambiguidade em lote.
+
+        Args:
+            resolutions: Tuplas (term, resolution, dominio)
+
+        Returns:
+            ID do embedding de cada resolução, ou None se não memorizada
+        """
+        return self.memorize_many([
+            (
+                f"{term} refere-se a {resolution}",
+                MemoryType.RESOLUCAO_AMBIGUIDADE,
+                dominio,
+                {"term": term, "resolution": resolution},
+            )
+            for term, resolution, dominio in resolutions
+        ])
+
     def memorize_user_preference(
         self,
         preference: str,
@@ -292,7 +590,7 @@ class MemoryAgent:
     def _log_write(self, entry: MemoryEntry, action: str):
         """Loga uma operação de escrita."""
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time_ns(),
             "action": action,
             "tipo": entry.tipo.value,
             "dominio": entry.dominio,
@@ -300,33 +598,43 @@ class MemoryAgent:
             "embedding_id": entry.embedding_id,
         }
         self._write_log.append(log_entry)
+        self._write_count += 1
         logger.info(f"Memory write: {action} - {entry.tipo.value}")
 
     def _log_read(self, query: str, results_count: int):
         """Loga uma operação de leitura."""
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time_ns(),
             "query_preview": query[:100],
             "results_count": results_count,
         }
         self._read_log.append(log_entry)
+        self._read_count += 1
         logger.info(f"Memory read: {results_count} results for query")
 
+    @staticmethod
+    def _format_log(log: deque[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Copia o log convertendo os timestamps (ns) para ISO 8601."""
+        return [
+            {**entry, "timestamp": datetime.fromtimestamp(entry["timestamp"] / 1e9).isoformat()}
+            for entry in log
+        ]
+
     def get_write_log(self) -> list[dict[str, Any]]:
-        """Retorna o log de escritas."""
-        return self._write_log.copy()
+        """Retorna o log de escritas (últimas LOG_MAXLEN operações)."""
+        return self._format_log(self._write_log)
 
     def get_read_log(self) -> list[dict[str, Any]]:
-        """Retorna o log de leituras."""
-        return self._read_log.copy()
+        """Retorna o log de leituras (últimas LOG_MAXLEN operações)."""
+        return self._format_log(self._read_log)
 
     def get_stats(self) -> dict[str, Any]:
         """Retorna estatísticas da memória."""
         return {
             "user_id": self.user_id,
             "total_memories": self.long_term.count(),
-            "write_operations": len(self._write_log),
-            "read_operations": len(self._read_log),
+            "write_operations": self._write_count,
+            "read_operations": self._read_count,
             "ambiguity_resolutions": len(
                 self.long_term.get_ambiguity_resolutions()
             ),
@@ -3,11 +3,14 @@ Modelos de dados para o sistema de memória.
 Define estruturas para entradas de memória e tipos.
 """
 
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any
 
+CONVERSATION_CONTEXT_MAXLEN = 100
+
 
 class MemoryType(Enum):
     """Tipos de memória suportados."""
@@ -81,7 +84,7 @@ class ShortTermState:
         current_group: Grupo atualmente selecionado
         last_query: Última pergunta do usuário
         last_response: Última resposta do sistema
-        conversation_context: Contexto da conversa atual
+        conversation_context: Contexto da conversa atual (janela limitada)
         raio_x_status: Status do Raio X do Cliente
         ambiguity_status: Status da retirada de ambiguidade
         memory_status: Status da memória (carregada, consultada, etc.)
@@ -92,7 +95,9 @@ class ShortTermState:
     current_group: dict[str, Any] | None = None
     last_query: str | None = None
     last_response: str | None = None
-    conversation_context: list[dict[str, Any]] = field(default_factory=list)
+    conversation_context: deque[dict[str, Any]] = field(
+        default_factory=lambda: deque(maxlen=CONVERSATION_CONTEXT_MAXLEN)
+    )
     raio_x_status: str = "pendente"
     ambiguity_status: str = "pendente"
     memory_status: dict[str, bool] = field(default_factory=lambda: {
@@ -110,7 +115,7 @@ class ShortTermState:
         self.current_group = None
         self.last_query = None
         self.last_response = None
-        self.conversation_context = []
+        self.conversation_context = deque(maxlen=CONVERSATION_CONTEXT_MAXLEN)
         self.raio_x_status = "pendente"
         self.ambiguity_status = "pendente"
         self.memory_status = {
@@ -4,6 +4,7 @@ Gerencia o estado da sessão usando st.session_state.
 Volátil, session-based, reset ao logout.
 """
 
+from itertools import islice
 from typing import Any
 
 import streamlit as st
@@ -63,7 +64,8 @@ class ShortTermMemory:
 
     def get_context(self, limit: int = 10) -> list[dict[str, Any]]:
         """Retorna o contexto recente da conversa."""
-        return self.state.conversation_context[-limit:]
+        context = self.state.conversation_context
+        return list(islice(context, max(len(context) - limit, 0), None))
 
     def set_raio_x_status(self, status: str):
         """Atualiza status do Raio X."""
@@ -108,7 +110,7 @@ class ShortTermMemory:
             "current_group": self.state.current_group,
             "last_query": self.state.last_query,
             "last_response": self.state.last_response,
-            "conversation_context": self.state.conversation_context,
+            "conversation_context": list(self.state.conversation_context),
             "raio_x_status": self.state.raio_x_status,
             "ambiguity_status": self.state.ambiguity_status,
             "memory_status": self.state.memory_status,
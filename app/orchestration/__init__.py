@@ -1,25 +1,34 @@
 """Módulo de orquestração de agentes."""
 
-from app.orchestration.critic import CriticAgent, create_critic_agent
-from app.orchestration.graph import (
-    DeepAgentOrchestrator,
-    create_deep_orchestrator_instance,
-    create_langgraph_workflow,
-)
-from app.orchestration.orchestrator import Orchestrator, create_orchestrator
-from app.orchestration.planner import PlannerAgent, create_planner_agent
-from app.orchestration.response import ResponseAgent, create_response_agent
+import importlib
+from typing import Any
 
-__all__ = [
-    "PlannerAgent",
-    "CriticAgent",
-    "ResponseAgent",
-    "Orchestrator",
-    "DeepAgentOrchestrator",
-    "create_planner_agent",
-    "create_critic_agent",
-    "create_response_agent",
-    "create_orchestrator",
-    "create_deep_orchestrator_instance",
-    "create_langgraph_workflow",
-]
+# Exportações carregadas sob demanda (PEP 562): importar um submódulo, como
+# app.orchestration.json_utils, não carrega LangChain/LangGraph/Databricks.
+_EXPORTS = {
+    "PlannerAgent": "app.orchestration.planner",
+    "CriticAgent": "app.orchestration.critic",
+    "ResponseAgent": "app.orchestration.response",
+    "TemplateResponseAgent": "app.orchestration.response",
+    "Orchestrator": "app.orchestration.orchestrator",
+    "DeepAgentOrchestrator": "app.orchestration.graph",
+    "PipelineResult": "app.orchestration.graph",
+    "create_planner_agent": "app.orchestration.planner",
+    "create_critic_agent": "app.orchestration.critic",
+    "create_response_agent": "app.orchestration.response",
+    "create_template_response_agent": "app.orchestration.response",
+    "create_orchestrator": "app.orchestration.orchestrator",
+    "create_deep_orchestrator_instance": "app.orchestration.graph",
+    "create_langgraph_workflow": "app.orchestration.graph",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
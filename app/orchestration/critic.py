@@ -9,13 +9,70 @@ Versão ENTERPRISE-SAFE:
 - Nunca quebra o pipeline
 """
 
+import re
+import string
+from collections import OrderedDict
 from typing import Any
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, Field
 
 from app.config.agents import CRITIC_AGENT_CONFIG
+from app.config.http_clients import get_http_client
 from app.governance.logging import SessionContext
+from app.orchestration.json_utils import decode_first_object, extract_json_block, loads_object
+from app.orchestration.llm_cache import cached_invoke
+
+# Referências do tipo schema.tabela citadas nas respostas dos subagentes
+_ENTITY_RE = re.compile(r"\b[a-z_]+\.[a-z_]+\b")
+
+# Contexto temporal da pergunta (datas, anos e meses): validações de períodos
+# diferentes da mesma tabela não se reaproveitam
+_TEMPORAL_RE = re.compile(
+    r"\b(?:\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}(?:-\d{2})?|(?:19|20)\d{2}"
+    r"|janeiro|fevereiro|março|abril|maio|junho|julho|agosto|setembro|outubro|novembro|dezembro)\b"
+)
+
+VALIDATION_CACHE_SIZE = 5
+
+_VALIDATION_TEMPLATE = string.Template("""Avalie as seguintes respostas dos subagentes para a pergunta do usuário.
+
+Pergunta original:
+$query
+
+Respostas dos subagentes:
+$responses_text
+
+Analise:
+1. As respostas respondem completamente à pergunta?
+2. Há inconsistências ou contradições entre as respostas?
+3. Os dados fazem sentido no contexto?
+4. Há informações faltando?
+
+Responda SOMENTE com um JSON válido no formato:
+
+{
+  "is_valid": true/false,
+  "completeness_score": 0-100,
+  "issues": ["lista de problemas encontrados"],
+  "suggestions": ["sugestões de melhoria"],
+  "summary": "resumo da validação"
+}""")
+
+
+class ValidationResult(BaseModel):
+    """Contrato de saída estruturada do CriticAgent."""
+
+    is_valid: bool
+    completeness_score: int = Field(ge=0, le=100)
+    issues: list[str] = Field(default_factory=list)
+    suggestions: list[str] = Field(default_factory=list)
+    summary: str = ""
+
+
+# Clientes compartilhados por (modelo, temperatura): reaproveita pool HTTP e TLS
+_LLM_CACHE: dict[tuple[str, float], ChatOpenAI] = {}
 
 
 class CriticAgent:
@@ -27,9 +84,12 @@ class CriticAgent:
         model_name: str = "gpt-4o-mini",
     ):
         self.config = CRITIC_AGENT_CONFIG
+        self._system_message = SystemMessage(content=self.config.system_prompt)
         self.session = session
         self.model_name = model_name
         self._llm = None
+        self._validation_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._structured_llm = None
 
     # ------------------------------------------------------------------
     # LLM
@@ -38,17 +98,41 @@ class CriticAgent:
     def llm(self) -> ChatOpenAI:
         """Retorna instância do LLM lazy-loaded."""
         if self._llm is None:
-            self._llm = ChatOpenAI(
-                model=self.model_name,
-                temperature=0,
-            )
+            key = (self.model_name, 0.0)
+            if key not in _LLM_CACHE:
+                _LLM_CACHE[key] = ChatOpenAI(
+                    model=self.model_name,
+                    temperature=0,
+                    max_retries=2,
+                    timeout=30,
+                    http_client=get_http_client(),
+                )
+            self._llm = _LLM_CACHE[key]
         return self._llm
 
+    @property
+    def structured_llm(self):
+        """LLM com saída estruturada no schema ValidationResult."""
+        if self._structured_llm is None:
+            self._structured_llm = self.llm.with_structured_output(ValidationResult)
+        return self._structured_llm
+
     # ------------------------------------------------------------------
     # Helpers internos
     # ------------------------------------------------------------------
     @staticmethod
-    def _normalize_llm_content(content: Any) -> str:
+    def _part_to_text(item: Any) -> str:
+        """Converte uma parte de conteúdo estruturado em texto."""
+        if type(item) is dict:
+            # padrão comum em mensagens estruturadas
+            if "text" in item:
+                return str(item["text"])
+            if "content" in item:
+                return str(item["content"])
+        return str(item)
+
+    @classmethod
+    def _normalize_llm_content(cls, content: Any) -> str:
         """
         Normaliza QUALQUER retorno do LLM para string.
 
@@ -58,30 +142,16 @@ class CriticAgent:
         - dict
         - None
         """
+        # Caminho rápido: quase toda resposta é str
+        content_type = type(content)
+        if content_type is str:
+            return content
+
         if content is None:
             return ""
 
-        if isinstance(content, str):
-            return content
-
-        if isinstance(content, list):
-            parts: list[str] = []
-            for item in content:
-                if isinstance(item, dict):
-                    # padrão comum em mensagens estruturadas
-                    if "text" in item:
-                        parts.append(str(item["text"]))
-                    elif "content" in item:
-                        parts.append(str(item["content"]))
-                    else:
-                        parts.append(str(item))
-                else:
-                    parts.append(str(item))
-            return "\n".join(parts)
-
-        if isinstance(content, dict):
-            # fallback seguro
-            return str(content)
+        if content_type is list:
+            return "\n".join([cls._part_to_text(item) for item in content])
 
         return str(content)
 
@@ -91,8 +161,6 @@ class CriticAgent:
         Extrai JSON de texto livre de forma defensiva.
         Nunca lança exceção.
         """
-        import json
-
         fallback: dict[str, Any] = {
             "is_valid": True,
             "completeness_score": 70,
@@ -105,28 +173,78 @@ class CriticAgent:
             fallback["summary"] = "Resposta vazia do modelo."
             return fallback
 
-        try:
-            start = text.find("{")
-            end = text.rfind("}") + 1
-
-            if start == -1 or end <= start:
-                return fallback
-
-            parsed = json.loads(text[start:end])
-
-            if isinstance(parsed, dict):
-                fallback.update(parsed)
-
+        payload = extract_json_block(text)
+        if not payload:
             return fallback
 
-        except Exception as e:
+        # Somente as chaves consumidas são materializadas
+        keys = tuple(fallback)
+        parsed = loads_object(payload, keys=keys)
+        if parsed is None:
+            # Bloco guloso pegou prosa após o JSON (ex.: "}" no texto): varredura única com raw_decode
+            obj = decode_first_object(text)
+            parsed = {key: obj[key] for key in keys if key in obj} if obj else None
+
+        if parsed is None:
             fallback["summary"] = (
                 "Erro ao interpretar resposta do modelo.\n"
-                f"Motivo: {str(e)}\n\n"
+                "Motivo: JSON inválido\n\n"
                 f"Conteúdo bruto:\n{text}"
             )
             return fallback
 
+        fallback.update(parsed)
+        return fallback
+
+    @staticmethod
+    def _entity_keys(query: str, responses: list[dict[str, Any]]) -> set[str]:
+        """
+        Chaves de cache (entidade, contexto temporal) da validação.
+
+        Entidades são as referências schema.tabela citadas nas respostas; o
+        contexto temporal são as datas, anos e meses citados na pergunta.
+        """
+        entities: set[str] = set()
+        for r in responses:
+            entities.update(_ENTITY_RE.findall(str(r.get("response", "")).lower()))
+        if not entities:
+            return entities
+
+        temporal = ",".join(sorted(set(_TEMPORAL_RE.findall(query.lower()))))
+        return {f"{entity}@{temporal}" for entity in entities}
+
+    def _get_cached_validation(self, entities: set[str]) -> dict[str, Any] | None:
+        """
+        Retorna validação consolidada se todas as entidades já foram
+        validadas com sucesso na janela recente.
+        """
+        if not entities or not entities.issubset(self._validation_cache):
+            return None
+
+        cached = [self._validation_cache[e] for e in entities]
+        if not all(v.get("is_valid", False) for v in cached):
+            return None
+
+        for entity in entities:
+            self._validation_cache.move_to_end(entity)
+
+        return {
+            "is_valid": True,
+            "completeness_score": min(v.get("completeness_score", 70) for v in cached),
+            "issues": [],
+            "suggestions": [],
+            "summary": "Validação reaproveitada do cache para as entidades: "
+            + ", ".join(sorted(entities)),
+        }
+
+    def _cache_validation(self, entities: set[str], validation: dict[str, Any]) -> None:
+        """Registra a validação por entidade, descartando as mais antigas."""
+        for entity in entities:
+            self._validation_cache[entity] = validation
+            self._validation_cache.move_to_end(entity)
+        while len(self._validation_cache) > VALIDATION_CACHE_SIZE:
+            self._validation_cache.popitem(last=False)
+
     # ------------------------------------------------------------------
     # Core
     # ------------------------------------------------------------------
@@ -145,62 +263,72 @@ class CriticAgent:
         Returns:
             Resultado da validação
         """
+        # Proteção contra responses malformadas: filtra uma única vez
+        dict_responses = [r for r in (responses or []) if isinstance(r, dict)]
+
         if self.session:
             self.session.log_agent_call(
                 self.config.name,
-                f"Validando {len(responses)} respostas",
+                f"Validando {len(dict_responses)} respostas",
             )
 
-        # Proteção contra responses malformadas
-        safe_responses = responses or []
-
-        responses_text = "\n\n".join(
-            f"**{r.get('agent', 'Unknown')}**:\n{r.get('response', 'Sem resposta')}"
-            for r in safe_responses
-            if isinstance(r, dict)
+        entities = self._entity_keys(query, dict_responses)
+        cached_validation = self._get_cached_validation(entities)
+        if cached_validation:
+            if self.session:
+                self.session.log_agent_call(
+                    self.config.name,
+                    "Validação obtida do cache",
+                    cached_validation["summary"],
+                )
+            return cached_validation
+
+        # Ignora respostas vazias e repetidas (mesmo agente e mesmo conteúdo)
+        seen: set[tuple[Any, int]] = set()
+        parts: list[str] = []
+        for r in dict_responses:
+            resp = r.get("response") or ""
+            key = (r.get("agent"), hash(resp))
+            if key in seen or not resp.strip():
+                continue
+            seen.add(key)
+            parts.append(f"**{r.get('agent', 'Unknown')}**:\n{resp}")
+
+        if not parts:
+            return {
+                "is_valid": False,
+                "completeness_score": 0,
+                "issues": ["Nenhuma resposta válida dos subagentes."],
+                "suggestions": [],
+                "summary": "Nenhuma resposta para validar.",
+            }
+
+        responses_text = "\n\n".join(parts)
+
+        validation_prompt = _VALIDATION_TEMPLATE.substitute(
+            query=query,
+            responses_text=responses_text,
         )
 
-        validation_prompt = f"""
-Avalie as seguintes respostas dos subagentes para a pergunta do usuário.
-
-Pergunta original:
-{query}
-
-Respostas dos subagentes:
-{responses_text}
-
-Analise:
-1. As respostas respondem completamente à pergunta?
-2. Há inconsistências ou contradições entre as respostas?
-3. Os dados fazem sentido no contexto?
-4. Há informações faltando?
-
-Responda SOMENTE com um JSON válido no formato:
-
-{{
-  "is_valid": true/false,
-  "completeness_score": 0-100,
-  "issues": ["lista de problemas encontrados"],
-  "suggestions": ["sugestões de melhoria"],
-  "summary": "resumo da validação"
-}}
-""".strip()
-
         messages = [
-            SystemMessage(content=self.config.system_prompt),
+            self._system_message,
             HumanMessage(content=validation_prompt),
         ]
 
         # ------------------------------
         # Invocação segura do LLM
         # ------------------------------
-        response = self.llm.invoke(messages)
+        try:
+            result = cached_invoke(self.structured_llm, messages, self.session)
+            validation = result.model_dump()
+        except Exception:
+            # Provider sem suporte a saída estruturada: parsing defensivo do texto
+            response = cached_invoke(self.llm, messages, self.session)
 
-        content = self._normalize_llm_content(
-            getattr(response, "content", response)
-        )
+            content = self._normalize_llm_content(response.content)
 
-        validation = self._safe_parse_json_from_text(content)
+            validation = self._safe_parse_json_from_text(content)
+        self._cache_validation(entities, validation)
 
         if self.session:
             self.session.log_agent_call(
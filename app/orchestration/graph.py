@@ -4,61 +4,120 @@ Fluxo multiagente com contrato de estado forte e validação rigorosa.
 VERSÃO CORRIGIDA - Pipeline semanticamente correto.
 """
 
-import json
+import asyncio
+import atexit
+import hashlib
 import logging
+import operator
+import os
+import queue
+import re
+import string
+import threading
 import traceback
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import cache, lru_cache, singledispatch
 from typing import Annotated, Any, TypedDict
 
-from langchain_core.messages import AIMessage, HumanMessage
-from langgraph.graph import END, StateGraph
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
+from langgraph.types import Send
+from pydantic import BaseModel, Field
 
 from app.config.agents import (
     AMBIGUITY_RESOLVER_AGENT_CONFIG,
     PLANNER_AGENT_CONFIG,
+    THEME_CONFIGS,
+    AgentConfig,
 )
 from app.governance.logging import SessionContext
 from app.memory.memory_agent import MemoryAgent, create_memory_agent
-from app.tools.databricks_tools import (
-    describe_table,
-    explain_table,
-    get_metadata,
-    list_catalogs,
-    list_schemas,
-    list_tables,
-    run_sql,
-    sample_data,
-    search_tables,
-)
+from app.orchestration.json_utils import decode_first_object
+from app.orchestration.llm_cache import LLMCache, cached_ainvoke, cached_astream
+from app.utils.serialization import dumps
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+try:
+    import tiktoken
+
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+    logger.warning("tiktoken not installed. Truncating prompts by characters.")
+
+# Orçamento de tokens do relatório enviado ao nó de visualização
+VISUALIZATION_REPORT_TOKENS = 250
 
 
 # ---------------------------------------------------------------------
 # Helpers globais (CRÍTICOS)
 # ---------------------------------------------------------------------
+@singledispatch
+def _normalize_content(content: Any) -> str:
+    return str(content)
+
+
+@_normalize_content.register
+def _(content: None) -> str:
+    return ""
+
+
+@_normalize_content.register
+def _(content: list) -> str:
+    return "\n".join([
+        str(item.get("text") or item.get("content") or item) if type(item) is dict else str(item)
+        for item in content
+    ])
+
+
 def normalize_llm_content(content: Any) -> str:
     """Normaliza QUALQUER retorno do LLM para string."""
-    if content is None:
-        return ""
-
-    if isinstance(content, str):
+    # Caminho rápido: quase toda resposta é str; demais formatos via singledispatch
+    if type(content) is str:
         return content
 
-    if isinstance(content, list):
-        parts: list[str] = []
-        for item in content:
-            if isinstance(item, dict):
-                parts.append(str(item.get("text") or item.get("content") or item))
-            else:
-                parts.append(str(item))
-        return "\n".join(parts)
+    return _normalize_content(content)
 
-    if isinstance(content, dict):
-        return str(content)
 
-    return str(content)
+@cache
+def _get_encoder() -> Any:
+    """Encoder do modelo padrão, carregado uma única vez."""
+    try:
+        return tiktoken.encoding_for_model("gpt-4o-mini")
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Trunca o texto ao orçamento de tokens, sem cortar no meio de um token.
+
+    Args:
+        text: Texto a truncar
+        max_tokens: Máximo de tokens mantidos
+
+    Returns:
+        Texto original ou prefixo com até max_tokens tokens
+    """
+    # Nenhum token tem menos de 1 caractere: texto curto já cabe no orçamento
+    if len(text) <= max_tokens:
+        return text
+
+    if not TIKTOKEN_AVAILABLE:
+        # Aproximação de ~4 caracteres por token
+        return text[: max_tokens * 4]
+
+    encoder = _get_encoder()
+    tokens = encoder.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoder.decode(tokens[:max_tokens])
 
 
 def safe_parse_json(text: str) -> dict[str, Any] | None:
@@ -66,58 +125,154 @@ def safe_parse_json(text: str) -> dict[str, Any] | None:
     if not text:
         return None
 
-    try:
-        start = text.find("{")
-        end = text.rfind("}") + 1
+    return decode_first_object(text)
 
-        if start == -1 or end <= start:
-            return None
 
-        parsed = json.loads(text[start:end])
-        return parsed if isinstance(parsed, dict) else None
+class AmbiguityItem(BaseModel):
+    term: str
+    resolution: str
+    domain: str | None = None
+
+
+class AmbiguityResult(BaseModel):
+    """Contrato de saída estruturada do resolvedor de ambiguidade."""
+
+    normalized_question: str
+    ambiguities_detected: list[AmbiguityItem] = Field(default_factory=list)
+    requires_clarification: bool = False
+    inferred_period: str | None = None
+    inferred_domains: list[str] = Field(default_factory=list)
 
-    except Exception:
-        return None
 
+class PlanStep(BaseModel):
+    agent: str
+    task: str
+    priority: int = 1
 
-class AgentState(TypedDict):
+
+class Plan(BaseModel):
+    """Contrato de saída estruturada do planner."""
+
+    steps: list[PlanStep] = Field(default_factory=list)
+    requires_visualization: bool = False
+    estimated_complexity: str = "medium"
+
+
+class AmbiguityPlan(AmbiguityResult, Plan):
+    """Contrato de saída do nó fundido (ambiguidade + plano em uma chamada)."""
+
+
+class ChartData(BaseModel):
+    labels: list[str] = Field(default_factory=list)
+    values: list[float] = Field(default_factory=list)
+    title: str = ""
+
+
+class VisualizationResult(BaseModel):
+    """Contrato de saída estruturada do nó de visualização."""
+
+    suggestion: str | None = None
+    chart_type: str | None = None
+    chart_data: ChartData | None = None
+
+
+def merge_dicts(left: dict[str, Any] | None, right: dict[str, Any] | None) -> dict[str, Any]:
+    """Reducer: combina atualizações de nós que rodam em paralelo."""
+    return {**(left or {}), **(right or {})}
+
+
+MESSAGES_MAXLEN = 4
+
+
+def bounded_add_messages(left: list, right: list) -> list:
+    """Reducer: add_messages mantendo apenas as últimas MESSAGES_MAXLEN mensagens."""
+    return add_messages(left, right)[-MESSAGES_MAXLEN:]
+
+
+class SubagentTask(TypedDict):
+    """Payload enviado (Send) para cada ramo de subagente do executor."""
+
+    agent: str
+    domain: str | None
+    prompt: str
+    cache_key: str
+
+
+@dataclass(slots=True)
+class AgentState:
     """
     Estado forte do pipeline multiagente.
-    Todos os campos são obrigatórios e validados.
+    Layout fixo (slots): nós leem campos por atributo e retornam só o que mudou.
     """
-    messages: Annotated[list, add_messages]
     original_query: str
-    normalized_query: str
-    active_domains: list[str]
-    group_context: dict[str, Any]
-    user_id: str
-    ambiguity_result: dict[str, Any]
-    ambiguity_resolved: bool
-    plan: list[dict[str, Any]]
-    subagent_responses: list[dict[str, Any]]
-    final_report: str
-    validation: dict[str, Any]
-    final_response: str
-    sources: list[str]
-    session_id: str
-    visualization_requested: bool
-    visualization_suggestion: str | None
-    visualization_data: dict[str, Any] | None
-    memory_context: list[dict[str, Any]]
-    memory_status: dict[str, bool]
-
-
-DATABRICKS_TOOLS = [
-    describe_table,
-    sample_data,
-    run_sql,
-    get_metadata,
-    list_catalogs,
-    list_schemas,
-    list_tables,
-    explain_table,
-    search_tables,
-]
+    messages: Annotated[list, bounded_add_messages] = field(default_factory=list)
+    normalized_query: str = ""
+    active_domains: list[str] = field(default_factory=list)
+    group_context: dict[str, Any] = field(default_factory=dict)
+    user_id: str = ""
+    ambiguity_result: dict[str, Any] = field(default_factory=dict)
+    ambiguity_resolved: bool = False
+    plan: list[dict[str, Any]] = field(default_factory=list)
+    # Cada ramo do fan-out (Send) devolve uma lista parcial; operator.add concatena
+    subagent_responses: Annotated[list[dict[str, Any]], operator.add] = field(default_factory=list)
+    final_report: str = ""
+    validation: dict[str, Any] = field(default_factory=dict)
+    final_response: str = ""
+    sources: Annotated[list[str], operator.add] = field(default_factory=list)
+    session_id: str = ""
+    visualization_requested: bool = False
+    visualization_suggestion: str | None = None
+    visualization_data: dict[str, Any] | None = None
+    memory_context: list[dict[str, Any]] = field(default_factory=list)
+    active_domains_str: str = ""
+    group_context_json: str = "{}"
+    memory_status: Annotated[dict[str, bool], merge_dicts] = field(default_factory=lambda: {
+        "contexto_carregado": False,
+        "memoria_consultada": False,
+        "ambiguidade_resolvida": False,
+        "resposta_entregue": False,
+    })
+
+
+@dataclass(slots=True, frozen=True)
+class PipelineResult:
+    """Resultado de uma execução do pipeline, lido por atributo."""
+    response: str = ""
+    normalized_query: str = ""
+    final_report: str = ""
+    validation: dict[str, Any] = field(default_factory=dict)
+    memory_status: dict[str, bool] = field(default_factory=dict)
+    sources: list[str] = field(default_factory=list)
+    visualization_suggestion: str | None = None
+    visualization_data: dict[str, Any] | None = None
+
+
+@cache
+def get_databricks_tools() -> list:
+    """Ferramentas do executor; import tardio (databricks-sdk/sql-connector são pesados)."""
+    from app.tools.databricks_tools import (
+        describe_table,
+        explain_table,
+        get_metadata,
+        list_catalogs,
+        list_schemas,
+        list_tables,
+        run_sql,
+        sample_data,
+        search_tables,
+    )
+
+    return [
+        describe_table,
+        sample_data,
+        run_sql,
+        get_metadata,
+        list_catalogs,
+        list_schemas,
+        list_tables,
+        explain_table,
+        search_tables,
+    ]
 
 VISUALIZATION_KEYWORDS = [
     "gráfico", "grafico", "chart", "visualização", "visualizacao",
@@ -128,33 +283,290 @@ VISUALIZATION_KEYWORDS = [
     "ao longo", "mensal", "trimestral", "série temporal", "serie temporal"
 ]
 
+# Pares (termo, termo complementar) que indicam pedido analítico/visual
+ANALYTICAL_PATTERNS = [
+    ("por mês", "mensal"),
+    ("por trimestre", "trimestral"),
+    ("ao longo", "tempo"),
+    ("entre", " e "),
+    ("compar", ""),
+    ("top ", ""),
+]
 
-def check_visualization_requested(query: str, plan: list[dict[str, Any]]) -> bool:
-    """Verifica se visualização foi solicitada na pergunta ou no plano."""
-    query_lower = query.lower()
+# Uma única alternação compilada substitui as buscas `in` por palavra-chave
+_VIZ_RE = re.compile("|".join(map(re.escape, VISUALIZATION_KEYWORDS)), re.IGNORECASE)
+_ANALYTICAL_RE = re.compile(
+    "|".join(
+        f"^(?=.*{re.escape(left)})(?=.*{re.escape(right)})" if right else re.escape(left)
+        for left, right in ANALYTICAL_PATTERNS
+    ),
+    re.IGNORECASE | re.DOTALL,
+)
+_PLAN_AGENT_VIZ_RE = re.compile("visualization", re.IGNORECASE)
+_PLAN_TASK_VIZ_RE = re.compile("visualização|graf", re.IGNORECASE)
+
+# Sinais de conteúdo estruturado no relatório (números, listas, métricas)
+_QUALITY_MARKERS = [
+    re.compile(r"\d"),
+    re.compile(r"^\s*[-•*]", re.MULTILINE),
+    re.compile(r"R\$|%|\b(?:total|média)\b", re.IGNORECASE),
+]
 
-    explicit_visual_request = any(keyword in query_lower for keyword in VISUALIZATION_KEYWORDS)
+# Prompts divididos em SystemMessage estática (instruções + formato de saída) e
+# HumanMessage só com as variáveis: o prefixo idêntico entre chamadas permite
+# que o provedor reaproveite o cache de prefixo.
+_AMBIGUITY_JSON_FORMAT = """Retorne SOMENTE JSON no formato:
+{
+    "normalized_question": "pergunta normalizada",
+    "ambiguities_detected": [
+        {"term": "termo", "resolution": "resolução", "domain": "domínio"}
+    ],
+    "requires_clarification": false,
+    "inferred_period": "período inferido ou null",
+    "inferred_domains": ["domínios inferidos"]
+}"""
 
-    analytical_patterns = [
-        ("por mês", "mensal"),
-        ("por trimestre", "trimestral"),
-        ("ao longo", "tempo"),
-        ("entre", " e "),
-        ("compar", ""),
-        ("top ", ""),
-    ]
-    analytical_request = any(
-        left in query_lower and (not right or right in query_lower)
-        for left, right in analytical_patterns
-    )
+_AVAILABLE_AGENTS = """Agentes disponíveis:
+- CadastroAgent: dados cadastrais do cliente
+- FinanceiroAgent: dados financeiros e transações
+- RentabilidadeAgent: métricas de rentabilidade
+- SQLAgent: consultas SQL ao Unity Catalog, exploracao de schemas e tabelas
+- ReportAgent: consolidação e relatório final
+- VisualizationAgent: gráficos (somente se solicitado)
+
+IMPORTANTE: Use SQLAgent quando o usuario quiser:
+- Explorar a estrutura do catalogo (listar catalogos, schemas, tabelas)
+- Entender o schema de uma tabela especifica
+- Executar consultas SQL personalizadas
+- Buscar tabelas por nome ou descricao"""
+
+_AMBIGUITY_SYSTEM = f"""{AMBIGUITY_RESOLVER_AGENT_CONFIG.system_prompt}
+
+{_AMBIGUITY_JSON_FORMAT}"""
+
+_AMBIGUITY_PROMPT = string.Template("""Pergunta do usuário:
+$original_query
+
+Domínios ativos: $active_domains
+Contexto do grupo: $group_context""")
+
+_PLANNER_SYSTEM = f"""{PLANNER_AGENT_CONFIG.system_prompt}
+
+Retorne JSON com o plano de execução:
+{{
+    "steps": [
+        {{"agent": "NomeDoAgente", "task": "descrição da tarefa", "priority": 1}}
+    ],
+    "requires_visualization": false,
+    "estimated_complexity": "low|medium|high"
+}}
+
+{_AVAILABLE_AGENTS}"""
+
+_PLANNER_PROMPT = string.Template("""Pergunta normalizada:
+$normalized_query
+
+Domínios ativos: $active_domains
+Contexto do grupo: $group_context""")
+
+# Pergunta curta com domínios definidos: ambiguidade e plano em uma única chamada
+FUSED_QUERY_MAXLEN = 200
+
+_FUSED_SYSTEM = f"""{AMBIGUITY_RESOLVER_AGENT_CONFIG.system_prompt}
+
+{PLANNER_AGENT_CONFIG.system_prompt}
+
+Normalize a pergunta resolvendo termos ambíguos e, em seguida, monte o plano
+de execução para a pergunta normalizada.
 
-    if explicit_visual_request or analytical_request:
+Retorne SOMENTE JSON no formato:
+{{
+    "normalized_question": "pergunta normalizada",
+    "ambiguities_detected": [
+        {{"term": "termo", "resolution": "resolução", "domain": "domínio"}}
+    ],
+    "requires_clarification": false,
+    "inferred_period": "período inferido ou null",
+    "inferred_domains": ["domínios inferidos"],
+    "steps": [
+        {{"agent": "NomeDoAgente", "task": "descrição da tarefa", "priority": 1}}
+    ],
+    "requires_visualization": false,
+    "estimated_complexity": "low|medium|high"
+}}
+
+{_AVAILABLE_AGENTS}"""
+
+_CRITIC_SYSTEM = """Você é o CriticAgent, responsável por validar a qualidade do relatório.
+
+Avalie o relatório e retorne SOMENTE JSON:
+{
+    "is_valid": true/false,
+    "completeness_score": 0-100,
+    "issues": ["lista de problemas encontrados"],
+    "summary": "resumo da validação"
+}
+
+Critérios de validação:
+1. O relatório responde à pergunta?
+2. O conteúdo é específico e não genérico?
+3. As informações são coerentes?
+4. O relatório é completo?"""
+
+_CRITIC_PROMPT = string.Template("""Pergunta original: $original_query
+Pergunta normalizada: $normalized_query
+
+Relatório a validar:
+$final_report""")
+
+_REPORT_SYSTEM = """Você é o ReportAgent, responsável por consolidar as respostas dos subagentes.
+
+Consolide todas as informações recebidas em um relatório único e coerente.
+O relatório deve:
+1. Responder diretamente à pergunta do usuário
+2. Integrar informações de todos os agentes
+3. Ser claro e objetivo
+4. NÃO pedir mais contexto ou informações"""
+
+_REPORT_PROMPT_HEADER = string.Template("""Pergunta original: $original_query
+Pergunta normalizada: $normalized_query
+
+Respostas dos subagentes:
+""")
+
+_STEP_CONTEXT_PROMPT = string.Template("""Pergunta original: $original_query
+Pergunta normalizada: $normalized_query
+Domínios ativos: $active_domains
+Contexto do grupo: $group_context""")
+
+
+# Nome do agente no plano (casefold) -> (config, domínio): lookup O(1) por passo
+AGENT_DISPATCH: dict[str, tuple[AgentConfig, str]] = {
+    config.name.casefold(): (config, theme) for theme, config in THEME_CONFIGS.items()
+}
+
+
+def _dispatch_key(agent_name: str) -> str:
+    return agent_name.casefold().replace(" ", "")
+
+
+# Respostas de subagentes já validadas pelo crítico, por (agente, tarefa, pergunta, contexto)
+_SUBAGENT_CACHE = LLMCache(
+    ttl_seconds=int(os.environ.get("SUBAGENT_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.environ.get("SUBAGENT_CACHE_MAX_ENTRIES", "256")),
+)
+
+
+def _subagent_cache_key(
+    agent_name: str,
+    task: str,
+    normalized_query: str,
+    group_context_json: str,
+) -> str:
+    """
+    Chave do cache de subagentes.
+
+    A tarefa do passo entra porque o plano pode dar vários passos ao mesmo
+    agente; o contexto do grupo entra para não misturar clientes.
+    """
+    digest = hashlib.blake2b(
+        f"{task}|{normalized_query}|{group_context_json}".encode(),
+        digest_size=16,
+    ).hexdigest()
+    return f"{_dispatch_key(agent_name)}:{digest}"
+
+
+@cache
+def _step_system_prompt(agent_name: str) -> str:
+    """System prompt de um passo do executor (fixo por agente)."""
+    config, _ = AGENT_DISPATCH.get(_dispatch_key(agent_name), (None, None))
+    persona = config.system_prompt if config else f"Você é o {agent_name}, um agente especializado."
+    return f"""{persona}
+
+Forneça uma resposta detalhada e específica para a tarefa.
+NÃO peça mais contexto - use as informações fornecidas.
+Se não houver dados suficientes, indique claramente o que está faltando."""
+
+
+_VISUALIZATION_SYSTEM = """Você é o VisualizationAgent, especialista em sugerir visualizações de dados.
+
+Sugira uma visualização apropriada. Retorne JSON:
+{
+    "suggestion": "descrição da visualização sugerida",
+    "chart_type": "bar|line|pie|scatter|area",
+    "chart_data": {
+        "labels": ["label1", "label2"],
+        "values": [10, 20],
+        "title": "Título do gráfico"
+    }
+}
+
+Se não houver dados numéricos para visualizar, retorne:
+{"suggestion": null, "chart_type": null, "chart_data": null}"""
+
+_VISUALIZATION_PROMPT = string.Template("""Pergunta: $normalized_query
+Relatório consolidado: $final_report""")
+
+_RESPONSE_SYSTEM = """Você é o ResponseAgent, responsável por formatar a resposta final para o usuário.
+
+INSTRUÇÕES:
+1. Formate o relatório consolidado de forma clara e profissional
+2. Use o conteúdo do relatório - NÃO invente informações
+3. NÃO peça mais contexto ou informações
+4. Se o relatório indicar falta de dados, explique isso claramente
+5. Mantenha um tom executivo e objetivo"""
+
+_RESPONSE_PROMPT = string.Template("""CONTEXTO COMPLETO:
+- Pergunta original: $original_query
+- Pergunta normalizada: $normalized_query
+- Domínios consultados: $sources
+
+RELATÓRIO CONSOLIDADO DOS AGENTES:
+$final_report
+
+VALIDAÇÃO DO CRITIC:
+- Válido: $is_valid
+- Score: $completeness_score
+- Resumo: $summary
+
+Gere a resposta final:""")
+
+# LLMs compartilhados entre workflows por (model_id, temperatura)
+_LLM_CACHE: dict[tuple[str, float], Any] = {}
+
+# Gravações de memória fora do caminho crítico; pool único para todas as requisições.
+# Independe do event loop: asyncio.run() do process_query não cancela as gravações.
+# Um único worker: a deduplicação de memorize_many (busca e depois grava) não
+# pode intercalar com outra gravação da mesma memória.
+_PERSIST_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-persist")
+atexit.register(_PERSIST_EXECUTOR.shutdown, wait=True)
+
+
+def _on_persist_done(future: Future) -> None:
+    if not future.cancelled() and future.exception():
+        logger.error("Background memory persist failed: %s", future.exception())
+
+
+# Limite de ramos simultâneos no fan-out de subagentes (evita rate limit)
+TOOL_CONCURRENCY_LIMIT = max(1, int(os.environ.get("TOOL_CONCURRENCY_LIMIT", "4")))
+
+# Perguntas simultâneas em process_batch (cada uma já abre seu próprio fan-out)
+BATCH_MAX_CONCURRENCY = max(1, int(os.environ.get("BATCH_MAX_CONCURRENCY", "4")))
+
+# Abaixo deste total de caracteres nas respostas, não há dados para visualizar
+VISUALIZATION_MIN_CHARS = 200
+
+# Aprova relatórios claramente estruturados sem chamar o LLM do crítico
+CRITIC_AGGRESSIVE = os.environ.get("CRITIC_AGGRESSIVE", "true").lower() == "true"
+
+
+def check_visualization_requested(query: str, plan: list[dict[str, Any]]) -> bool:
+    """Verifica se visualização foi solicitada na pergunta ou no plano."""
+    if _VIZ_RE.search(query) or _ANALYTICAL_RE.search(query):
         return True
 
     for step in plan:
-        agent = step.get("agent", "").lower()
-        task = step.get("task", "").lower()
-        if "visualization" in agent or "visualização" in task or "graf" in task:
+        if _PLAN_AGENT_VIZ_RE.search(step.get("agent", "")) or _PLAN_TASK_VIZ_RE.search(step.get("task", "")):
             return True
 
     return False
@@ -165,16 +577,19 @@ def create_langgraph_workflow(
     user_id: str | None = None,
     model_id: str | None = None,
     debug_mode: bool = False,
+    critic_aggressive: bool = CRITIC_AGGRESSIVE,
 ) -> StateGraph:
     from app.config.models import DEFAULT_MODEL, get_model_config
+    from app.orchestration.critic import ValidationResult
 
-    print("\n[DEBUG] ========== CREATING LANGGRAPH WORKFLOW ==========")
-    print(f"[DEBUG] Requested model_id: {model_id}")
-    print(f"[DEBUG] Debug mode: {debug_mode}")
+    if debug_mode:
+        logger.debug("========== CREATING LANGGRAPH WORKFLOW ==========")
+    logger.debug("Requested model_id: %s", model_id)
+    logger.debug("Debug mode: %s", debug_mode)
 
     if not model_id:
         model_id = DEFAULT_MODEL
-        print(f"[DEBUG] No model_id provided, using DEFAULT_MODEL: {model_id}")
+        logger.debug("No model_id provided, using DEFAULT_MODEL: %s", model_id)
 
     model_config = get_model_config(model_id)
     supports_tools = False
@@ -182,41 +597,97 @@ def create_langgraph_workflow(
     active_provider = None
 
     if model_config:
-        print(f"[DEBUG] Model config found: {model_config.display_name}")
-        print(f"[DEBUG] Provider: {model_config.provider.value}")
-        print(f"[DEBUG] Endpoint: {model_config.endpoint_name or model_config.model_name}")
-        print(f"[DEBUG] Supports tools: {model_config.supports_tools}")
+        logger.debug("Model config found: %s", model_config.display_name)
+        logger.debug("Provider: %s", model_config.provider.value)
+        logger.debug("Endpoint: %s", model_config.endpoint_name or model_config.model_name)
+        logger.debug("Supports tools: %s", model_config.supports_tools)
         supports_tools = model_config.supports_tools
         active_provider = model_config.provider
 
         try:
-            from app.config.llm import create_llm
-            llm = create_llm(model_id=model_id, temperature=0)
-            print(f"[DEBUG] LLM created successfully: {type(llm).__name__}")
+            key = (model_id, 0.0)
+            if key not in _LLM_CACHE:
+                from app.config.llm import create_llm
+                _LLM_CACHE[key] = create_llm(model_id=model_id, temperature=0)
+                logger.debug("LLM created successfully: %s", type(_LLM_CACHE[key]).__name__)
+            else:
+                logger.debug("Reusing cached LLM for model: %s", model_id)
+            llm = _LLM_CACHE[key]
         except Exception as e:
-            print(f"[DEBUG] ERROR creating LLM: {e}")
-            print(f"[DEBUG] Stack trace:\n{traceback.format_exc()}")
-            print("[DEBUG] CRITICAL: LLM creation failed. NOT using silent fallback.")
-            print("[DEBUG] CRITICAL: Please check your Databricks credentials and endpoint configuration.")
+            logger.error("Error creating LLM: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Stack trace:\n%s", traceback.format_exc())
+            logger.error("LLM creation failed. NOT using silent fallback.")
+            logger.error("Please check your Databricks credentials and endpoint configuration.")
             raise RuntimeError(f"Failed to create LLM for model {model_id}: {e}") from e
     else:
-        print(f"[DEBUG] ERROR: Model config not found for: {model_id}")
-        print("[DEBUG] CRITICAL: Invalid model_id. NOT using silent fallback.")
+        logger.error("Model config not found for: %s", model_id)
+        logger.error("Invalid model_id. NOT using silent fallback.")
         raise ValueError(f"Model config not found for: {model_id}")
 
-    print(f"[DEBUG] Active provider: {active_provider.value if active_provider else 'None'}")
-    print("[DEBUG] ========== WORKFLOW SETUP COMPLETE ==========\n")
+    logger.debug("Active provider: %s", active_provider.value if active_provider else 'None')
+    if debug_mode:
+        logger.debug("========== WORKFLOW SETUP COMPLETE ==========")
+
+    def log_banner(node: str) -> None:
+        """Banner de início de nó, só em debug_mode."""
+        if debug_mode:
+            logger.debug("[NODE] ========== %s ==========", node)
 
     memory_agent: MemoryAgent | None = create_memory_agent(user_id) if user_id else None
 
+    # bind_tools serializa os schemas das ferramentas: feito uma vez por workflow
+    llm_for_tools = llm.bind_tools(get_databricks_tools()) if supports_tools else llm
+    logger.debug("Executor tool binding: %s", "bind_tools" if supports_tools else "LLM direto")
+
+    # Saída estruturada só para providers com tool calling (ChatDatabricks não suporta)
+    structured_llms: dict[type[BaseModel], Any] = {}
+    if supports_tools:
+        for schema in (AmbiguityResult, Plan, AmbiguityPlan, ValidationResult, VisualizationResult):
+            structured_llms[schema] = llm.with_structured_output(schema)
+
+    def get_session(config: RunnableConfig | None) -> SessionContext | None:
+        """Sessão da execução atual (via config["configurable"]) ou a do workflow."""
+        return (config or {}).get("configurable", {}).get("session") or session
+
+    async def ainvoke_json(
+        system: str,
+        prompt: str,
+        schema: type[BaseModel],
+        session: SessionContext | None,
+    ) -> dict[str, Any] | None:
+        """Invoca o LLM esperando JSON no schema; cai para parsing de texto."""
+        messages = [SystemMessage(content=system), HumanMessage(content=prompt)]
+
+        if schema in structured_llms:
+            try:
+                result = await cached_ainvoke(structured_llms[schema], messages, session)
+                return result.model_dump()
+            except Exception as e:
+                logger.warning(f"Structured output failed for {schema.__name__}: {e}")
+
+        # Stream encerrado assim que o objeto JSON fecha: parsing sem esperar o fim
+        content = await cached_astream(
+            llm, messages, session, until_json=True, normalize=normalize_llm_content
+        )
+        logger.debug("[NODE] Response length: %s", len(content))
+        return safe_parse_json(content)
+
+    def prelude_node(state: AgentState) -> dict[str, Any]:
+        """Serializa uma única vez os trechos de contexto reaproveitados nos prompts."""
+        return {
+            "active_domains_str": ", ".join(state.active_domains),
+            "group_context_json": dumps(state.group_context),
+        }
+
     def memory_recall_node(state: AgentState) -> dict[str, Any]:
-        print("\n[NODE] ========== MEMORY_RECALL ==========")
+        log_banner("MEMORY_RECALL")
         memory_context = []
-        memory_status = state.get("memory_status", {}).copy()
+        memory_status: dict[str, bool] = {}
 
         if memory_agent:
             memories = memory_agent.recall_ambiguity_resolutions(
-                state["original_query"]
+                state.original_query
             )[:5]
 
             for mem in memories:
@@ -232,271 +703,362 @@ def create_langgraph_workflow(
 
         memory_status["contexto_carregado"] = True
 
-        print(f"[NODE] Memory context loaded: {len(memory_context)} items")
-        print(f"[NODE] Memory status: {memory_status}")
+        logger.debug("[NODE] Memory context loaded: %s items", len(memory_context))
+        logger.debug("[NODE] Memory status: %s", memory_status)
 
         return {
             "memory_context": memory_context,
             "memory_status": memory_status,
-            "messages": [AIMessage(content=f"Memória carregada ({len(memory_context)})")],
         }
 
-    def ambiguity_resolver_node(state: AgentState) -> dict[str, Any]:
-        print("\n[NODE] ========== AMBIGUITY_RESOLVER ==========")
+    async def ambiguity_resolver_node(state: AgentState, config: RunnableConfig) -> dict[str, Any]:
+        log_banner("AMBIGUITY_RESOLVER")
 
-        if state.get("ambiguity_resolved", False):
-            print("[NODE] Ambiguity already resolved, skipping")
+        if state.ambiguity_resolved:
+            logger.debug("[NODE] Ambiguity already resolved, skipping")
             return {}
 
-        prompt = f"""{AMBIGUITY_RESOLVER_AGENT_CONFIG.system_prompt}
-
-Pergunta do usuário:
-{state['original_query']}
-
-Domínios ativos: {', '.join(state.get('active_domains', []))}
-Contexto do grupo: {json.dumps(state.get('group_context', {}), ensure_ascii=False)}
-
-Retorne SOMENTE JSON no formato:
-{{
-    "normalized_question": "pergunta normalizada",
-    "ambiguities_detected": [
-        {{"term": "termo", "resolution": "resolução", "domain": "domínio"}}
-    ],
-    "requires_clarification": false,
-    "inferred_period": "período inferido ou null",
-    "inferred_domains": ["domínios inferidos"]
-}}"""
+        # Roda em paralelo com memory_recall: a busca no cache semântico fica aqui
+        cached = None
+        if memory_agent:
+            cached = await asyncio.to_thread(
+                memory_agent.get_cached_ambiguity,
+                state.original_query,
+                state.active_domains,
+                state.group_context,
+            )
+        if cached:
+            logger.debug("[NODE] Using cached ambiguity resolution")
+            return {
+                "normalized_query": cached.get("normalized_question") or state.normalized_query,
+                "ambiguity_result": cached,
+                "ambiguity_resolved": True,
+                "memory_status": {"ambiguidade_resolvida": True},
+            }
 
-        print(f"[NODE] Prompt length: {len(prompt)}")
+        prompt = _AMBIGUITY_PROMPT.substitute(
+            original_query=state.original_query,
+            active_domains=state.active_domains_str,
+            group_context=state.group_context_json,
+        )
 
-        response = llm.invoke([HumanMessage(content=prompt)])
-        content = normalize_llm_content(response.content)
+        logger.debug("[NODE] Prompt length: %s", len(prompt))
 
-        print(f"[NODE] Response length: {len(content)}")
+        ambiguity = await ainvoke_json(_AMBIGUITY_SYSTEM, prompt, AmbiguityResult, get_session(config))
+        if ambiguity and memory_agent:
+            await asyncio.to_thread(
+                memory_agent.cache_ambiguity,
+                state.original_query,
+                ambiguity,
+                state.active_domains,
+                state.group_context,
+            )
 
-        ambiguity = safe_parse_json(content) or {
-            "normalized_question": state["original_query"],
+        ambiguity = ambiguity or {
+            "normalized_question": state.normalized_query,
             "ambiguities_detected": [],
             "requires_clarification": False,
         }
 
-        memory_status = state.get("memory_status", {}).copy()
-        memory_status["ambiguidade_resolvida"] = True
-
-        print(f"[NODE] Normalized query: {ambiguity.get('normalized_question', '')[:100]}...")
-        print(f"[NODE] Ambiguities detected: {len(ambiguity.get('ambiguities_detected', []))}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[NODE] Normalized query: %s...", ambiguity.get('normalized_question', '')[:100])
+        logger.debug("[NODE] Ambiguities detected: %s", len(ambiguity.get('ambiguities_detected', [])))
 
         return {
-            "normalized_query": ambiguity.get("normalized_question", state["original_query"]),
+            "normalized_query": ambiguity.get("normalized_question") or state.normalized_query,
             "ambiguity_result": ambiguity,
             "ambiguity_resolved": True,
-            "memory_status": memory_status,
+            "memory_status": {"ambiguidade_resolvida": True},
         }
 
-    def planner_node(state: AgentState) -> dict[str, Any]:
-        print("\n[NODE] ========== PLANNER ==========")
-
-        prompt = f"""{PLANNER_AGENT_CONFIG.system_prompt}
-
-Pergunta normalizada:
-{state['normalized_query']}
-
-Domínios ativos: {', '.join(state.get('active_domains', []))}
-Contexto do grupo: {json.dumps(state.get('group_context', {}), ensure_ascii=False)}
-
-Retorne JSON com o plano de execução:
-{{
-    "steps": [
-        {{"agent": "NomeDoAgente", "task": "descrição da tarefa", "priority": 1}}
-    ],
-    "requires_visualization": false,
-    "estimated_complexity": "low|medium|high"
-}}
-
-Agentes disponíveis:
-- CadastroAgent: dados cadastrais do cliente
-- FinanceiroAgent: dados financeiros e transações
-- RentabilidadeAgent: métricas de rentabilidade
-- SQLAgent: consultas SQL ao Unity Catalog, exploracao de schemas e tabelas
-- ReportAgent: consolidação e relatório final
-- VisualizationAgent: gráficos (somente se solicitado)
-
-IMPORTANTE: Use SQLAgent quando o usuario quiser:
-- Explorar a estrutura do catalogo (listar catalogos, schemas, tabelas)
-- Entender o schema de uma tabela especifica
-- Executar consultas SQL personalizadas
-- Buscar tabelas por nome ou descricao"""
-
-        print(f"[NODE] Prompt length: {len(prompt)}")
+    async def planner_node(state: AgentState, config: RunnableConfig) -> dict[str, Any]:
+        log_banner("PLANNER")
 
-        response = llm.invoke([HumanMessage(content=prompt)])
-        content = normalize_llm_content(response.content)
+        prompt = _PLANNER_PROMPT.substitute(
+            normalized_query=state.normalized_query,
+            active_domains=state.active_domains_str,
+            group_context=state.group_context_json,
+        )
 
-        print(f"[NODE] Response length: {len(content)}")
+        logger.debug("[NODE] Prompt length: %s", len(prompt))
 
-        plan_data = safe_parse_json(content)
+        # Pergunta normalizada semanticamente igual no mesmo contexto: reaproveita o plano
+        plan_data = None
+        if memory_agent:
+            plan_data = await asyncio.to_thread(
+                memory_agent.get_cached_plan,
+                state.normalized_query,
+                state.active_domains,
+                state.group_context,
+            )
+            if plan_data:
+                logger.debug("[NODE] Using cached plan")
+
+        if not plan_data:
+            plan_data = await ainvoke_json(_PLANNER_SYSTEM, prompt, Plan, get_session(config))
+            if plan_data and plan_data.get("steps") and memory_agent:
+                await asyncio.to_thread(
+                    memory_agent.cache_plan,
+                    state.normalized_query,
+                    plan_data,
+                    state.active_domains,
+                    state.group_context,
+                )
         plan = plan_data.get("steps", []) if plan_data else []
 
         visualization_requested = check_visualization_requested(
-            state["normalized_query"],
+            state.normalized_query,
             plan
         )
         if plan_data:
             visualization_requested = visualization_requested or plan_data.get("requires_visualization", False)
 
-        print(f"[NODE] Plan steps: {len(plan)}")
-        print(f"[NODE] Visualization requested: {visualization_requested}")
-        for i, step in enumerate(plan):
-            print(f"[NODE]   Step {i+1}: {step.get('agent', 'Unknown')} - {step.get('task', '')[:50]}...")
+        logger.debug("[NODE] Plan steps: %s", len(plan))
+        logger.debug("[NODE] Visualization requested: %s", visualization_requested)
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, step in enumerate(plan):
+                logger.debug("[NODE]   Step %s: %s - %s...", i+1, step.get('agent', 'Unknown'), step.get('task', '')[:50])
 
         return {
             "plan": plan,
             "visualization_requested": visualization_requested,
         }
 
-    def executor_node(state: AgentState) -> dict[str, Any]:
-        print("\n[NODE] ========== EXECUTOR ==========")
-        print(f"[NODE] Active provider: {active_provider.value if active_provider else 'None'}")
-        print(f"[NODE] Model: {model_id}")
-        print(f"[NODE] Plan steps: {len(state.get('plan', []))}")
+    async def fused_ambiguity_planner_node(
+        state: AgentState,
+        config: RunnableConfig,
+    ) -> dict[str, Any]:
+        log_banner("FUSED_AMBIGUITY_PLANNER")
+
+        prompt = _AMBIGUITY_PROMPT.substitute(
+            original_query=state.original_query,
+            active_domains=state.active_domains_str,
+            group_context=state.group_context_json,
+        )
 
-        responses = []
+        logger.debug("[NODE] Prompt length: %s", len(prompt))
 
-        if supports_tools:
-            print("[NODE] Model supports tools, using bind_tools")
-            llm_for_tools = llm.bind_tools(DATABRICKS_TOOLS)
-        else:
-            print("[NODE] Model doesn't support bind_tools, using LLM directly")
-            llm_for_tools = llm
+        result = await ainvoke_json(_FUSED_SYSTEM, prompt, AmbiguityPlan, get_session(config)) or {}
 
-        for step in state.get("plan", []):
-            agent_name = step.get("agent", "")
-            task = step.get("task", state["normalized_query"])
+        normalized_query = result.get("normalized_question") or state.normalized_query
+        ambiguity = {
+            "normalized_question": normalized_query,
+            "ambiguities_detected": result.get("ambiguities_detected", []),
+            "requires_clarification": result.get("requires_clarification", False),
+            "inferred_period": result.get("inferred_period"),
+            "inferred_domains": result.get("inferred_domains", []),
+        }
+        plan = result.get("steps", [])
+
+        visualization_requested = check_visualization_requested(normalized_query, plan)
+        visualization_requested = visualization_requested or result.get("requires_visualization", False)
+
+        logger.debug("[NODE] Ambiguities detected: %s", len(ambiguity["ambiguities_detected"]))
+        logger.debug("[NODE] Plan steps: %s", len(plan))
+        logger.debug("[NODE] Visualization requested: %s", visualization_requested)
+
+        return {
+            "normalized_query": normalized_query,
+            "ambiguity_result": ambiguity,
+            "ambiguity_resolved": True,
+            "memory_status": {"ambiguidade_resolvida": True},
+            "plan": plan,
+            "visualization_requested": visualization_requested,
+        }
+
+    def route_after_prelude(state: AgentState) -> list[str]:
+        """Pergunta curta com domínios ativos vai para o nó fundido."""
+        if len(state.original_query) < FUSED_QUERY_MAXLEN and state.active_domains:
+            return ["memory_recall", "fused_ambiguity_planner"]
+        return ["memory_recall", "ambiguity_resolver"]
 
-            print(f"[NODE] Executing: {agent_name}")
+    def executor_node(state: AgentState) -> dict[str, Any]:
+        log_banner("EXECUTOR")
+        logger.debug("[NODE] Active provider: %s", active_provider.value if active_provider else 'None')
+        logger.debug("[NODE] Model: %s", model_id)
+        logger.debug("[NODE] Plan steps: %s", len(state.plan))
+        return {}
+
+    def dispatch_steps(state: AgentState) -> list[Send] | str:
+        """Fan-out: um ramo "subagent" por passo do plano, executados em paralelo."""
+        steps: list[tuple[str, str]] = []
+        for step in state.plan:
+            agent_name = step.get("agent", "")
+            task = step.get("task", state.normalized_query)
 
             if agent_name == "VisualizationAgent":
-                print("[NODE] Skipping VisualizationAgent in executor (handled separately)")
+                logger.debug("[NODE] Skipping VisualizationAgent in executor (handled separately)")
                 continue
 
-            agent_prompt = f"""Você é o {agent_name}, um agente especializado.
+            steps.append((agent_name, task))
 
-Tarefa: {task}
+        if not steps:
+            return "report"
 
-Pergunta original: {state['original_query']}
-Pergunta normalizada: {state['normalized_query']}
-Domínios ativos: {', '.join(state.get('active_domains', []))}
-Contexto do grupo: {json.dumps(state.get('group_context', {}), ensure_ascii=False)}
+        # Trecho comum a todos os passos: montado uma vez por execução
+        step_context = _STEP_CONTEXT_PROMPT.substitute(
+            original_query=state.original_query,
+            normalized_query=state.normalized_query,
+            active_domains=state.active_domains_str,
+            group_context=state.group_context_json,
+        )
 
-Forneça uma resposta detalhada e específica para a tarefa.
-NÃO peça mais contexto - use as informações fornecidas.
-Se não houver dados suficientes, indique claramente o que está faltando."""
+        return [
+            Send("subagent", SubagentTask(
+                agent=agent_name,
+                domain=AGENT_DISPATCH.get(_dispatch_key(agent_name), (None, None))[1],
+                prompt="".join(["Tarefa: ", task, "\n\n", step_context]),
+                cache_key=_subagent_cache_key(
+                    agent_name, task, state.normalized_query, state.group_context_json
+                ),
+            ))
+            for agent_name, task in steps
+        ]
 
-            try:
-                response = llm_for_tools.invoke([HumanMessage(content=agent_prompt)])
-                content = normalize_llm_content(response.content)
-                print(f"[NODE] {agent_name} response length: {len(content)}")
+    async def subagent_node(task: SubagentTask, config: RunnableConfig) -> dict[str, Any]:
+        agent_name = task["agent"]
 
-                responses.append({
+        cached = _SUBAGENT_CACHE.get(task["cache_key"])
+        if cached is not None:
+            logger.debug("[NODE] Using cached response for %s", agent_name)
+            return {
+                "subagent_responses": [{
                     "agent": agent_name,
-                    "response": content,
+                    "domain": task["domain"],
+                    "response": cached,
                     "success": True,
-                })
-            except Exception as e:
-                print(f"[NODE] ERROR in {agent_name}: {e}")
-                responses.append({
+                    "cache_key": task["cache_key"],
+                }],
+                "sources": [agent_name],
+            }
+
+        logger.debug("[NODE] Executing: %s", agent_name)
+
+        try:
+            response = await cached_ainvoke(
+                llm_for_tools,
+                [
+                    SystemMessage(content=_step_system_prompt(agent_name)),
+                    HumanMessage(content=task["prompt"]),
+                ],
+                get_session(config),
+            )
+        except Exception as e:
+            logger.error("[NODE] Error in %s: %s", agent_name, e)
+            return {
+                "subagent_responses": [{
                     "agent": agent_name,
+                    "domain": task["domain"],
                     "response": f"Erro: {str(e)}",
                     "success": False,
-                })
+                }],
+                "sources": [agent_name],
+            }
 
-        final_report = ""
-        if responses:
-            report_prompt = f"""Você é o ReportAgent, responsável por consolidar as respostas dos subagentes.
+        result = normalize_llm_content(response.content)
+        logger.debug("[NODE] %s response length: %s", agent_name, len(result))
 
-Pergunta original: {state['original_query']}
-Pergunta normalizada: {state['normalized_query']}
+        return {
+            "subagent_responses": [{
+                "agent": agent_name,
+                "domain": task["domain"],
+                "response": result,
+                "success": True,
+                # Gravada no cache pelo response_node se o crítico aprovar
+                "cache_key": task["cache_key"],
+            }],
+            "sources": [agent_name],
+        }
 
-Respostas dos subagentes:
-"""
-            for r in responses:
-                report_prompt += f"\n--- {r['agent']} ---\n{r['response']}\n"
+    async def report_node(state: AgentState, config: RunnableConfig) -> dict[str, Any]:
+        log_banner("REPORT")
+        responses = state.subagent_responses
 
-            report_prompt += """
-Consolide todas as informações acima em um relatório único e coerente.
-O relatório deve:
-1. Responder diretamente à pergunta do usuário
-2. Integrar informações de todos os agentes
-3. Ser claro e objetivo
-4. NÃO pedir mais contexto ou informações"""
+        final_report = ""
+        if responses:
+            body_parts = [f"\n--- {r['agent']} ---\n{r['response']}\n" for r in responses]
+            report_prompt = "".join([
+                _REPORT_PROMPT_HEADER.substitute(
+                    original_query=state.original_query,
+                    normalized_query=state.normalized_query,
+                ),
+                *body_parts,
+            ])
 
             try:
-                report_response = llm.invoke([HumanMessage(content=report_prompt)])
+                report_response = await cached_ainvoke(
+                    llm,
+                    [SystemMessage(content=_REPORT_SYSTEM), HumanMessage(content=report_prompt)],
+                    get_session(config),
+                )
                 final_report = normalize_llm_content(report_response.content)
-                print(f"[NODE] Final report generated, length: {len(final_report)}")
+                logger.debug("[NODE] Final report generated, length: %s", len(final_report))
             except Exception as e:
-                print(f"[NODE] ERROR generating final report: {e}")
+                logger.error("[NODE] Error generating final report: %s", e)
                 final_report = "\n\n".join([f"[{r['agent']}]: {r['response']}" for r in responses])
 
-        print(f"[NODE] Executor completed with {len(responses)} responses")
-        print(f"[NODE] Final report preview: {final_report[:200]}...")
+        logger.debug("[NODE] Executor completed with %s responses", len(responses))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[NODE] Final report preview: %s...", final_report[:200])
 
         return {
-            "subagent_responses": responses,
-            "sources": [r["agent"] for r in responses],
             "final_report": final_report,
         }
 
-    def visualization_node(state: AgentState) -> dict[str, Any]:
-        print("\n[NODE] ========== VISUALIZATION ==========")
+    async def visualization_node(state: AgentState, config: RunnableConfig) -> dict[str, Any]:
+        log_banner("VISUALIZATION")
 
-        if not state.get("visualization_requested", False):
-            print("[NODE] Visualization not requested, skipping")
+        if not state.visualization_requested:
+            logger.debug("[NODE] Visualization not requested, skipping")
             return {
                 "visualization_suggestion": None,
                 "visualization_data": None,
             }
 
-        print("[NODE] Visualization requested, processing...")
-
-        viz_prompt = f"""Você é o VisualizationAgent, especialista em sugerir visualizações de dados.
-
-Pergunta: {state['normalized_query']}
-Relatório consolidado: {state.get('final_report', '')[:1000]}
-
-Sugira uma visualização apropriada. Retorne JSON:
-{{
-    "suggestion": "descrição da visualização sugerida",
-    "chart_type": "bar|line|pie|scatter|area",
-    "chart_data": {{
-        "labels": ["label1", "label2"],
-        "values": [10, 20],
-        "title": "Título do gráfico"
-    }}
-}}
+        # Sem conteúdo suficiente nas respostas, não há o que plotar
+        if sum(len(r.get("response", "")) for r in state.subagent_responses) < VISUALIZATION_MIN_CHARS:
+            logger.debug("[NODE] Subagent responses too short to chart, skipping")
+            return {
+                "visualization_suggestion": None,
+                "visualization_data": None,
+            }
 
-Se não houver dados numéricos para visualizar, retorne:
-{{"suggestion": null, "chart_type": null, "chart_data": null}}"""
+        logger.debug("[NODE] Visualization requested, processing...")
 
-        response = llm.invoke([HumanMessage(content=viz_prompt)])
-        content = normalize_llm_content(response.content)
+        viz_prompt = _VISUALIZATION_PROMPT.substitute(
+            normalized_query=state.normalized_query,
+            final_report=truncate_to_tokens(state.final_report, VISUALIZATION_REPORT_TOKENS),
+        )
 
-        viz = safe_parse_json(content)
+        viz = await ainvoke_json(
+            _VISUALIZATION_SYSTEM, viz_prompt, VisualizationResult, get_session(config)
+        )
 
-        print(f"[NODE] Visualization suggestion: {viz.get('suggestion') if viz else None}")
+        logger.debug("[NODE] Visualization suggestion: %s", viz.get('suggestion') if viz else None)
 
         return {
             "visualization_suggestion": viz.get("suggestion") if viz else None,
             "visualization_data": viz.get("chart_data") if viz else None,
         }
 
-    def critic_node(state: AgentState) -> dict[str, Any]:
-        print("\n[NODE] ========== CRITIC ==========")
+    async def critic_node(state: AgentState, config: RunnableConfig) -> dict[str, Any]:
+        log_banner("CRITIC")
+
+        if not state.subagent_responses:
+            logger.debug("[NODE] CRITIC: No subagent responses, skipping LLM validation")
+            return {
+                "validation": {
+                    "is_valid": False,
+                    "completeness_score": 0,
+                    "issues": ["Nenhuma resposta válida dos subagentes."],
+                    "summary": "Nenhuma resposta para validar.",
+                }
+            }
 
-        final_report = state.get("final_report", "")
+        final_report = state.final_report
 
         if not final_report or len(final_report) < 50:
-            print("[NODE] CRITIC: Final report is empty or too short")
+            logger.debug("[NODE] CRITIC: Final report is empty or too short")
             return {
                 "validation": {
                     "is_valid": False,
@@ -518,7 +1080,7 @@ Se não houver dados numéricos para visualizar, retorne:
         is_generic = any(phrase in report_lower for phrase in generic_phrases)
 
         if is_generic:
-            print("[NODE] CRITIC: Final report contains generic/evasive phrases")
+            logger.debug("[NODE] CRITIC: Final report contains generic/evasive phrases")
             return {
                 "validation": {
                     "is_valid": False,
@@ -528,142 +1090,185 @@ Se não houver dados numéricos para visualizar, retorne:
                 }
             }
 
-        critic_prompt = f"""Você é o CriticAgent, responsável por validar a qualidade do relatório.
-
-Pergunta original: {state['original_query']}
-Pergunta normalizada: {state['normalized_query']}
-
-Relatório a validar:
-{final_report}
-
-Avalie o relatório e retorne SOMENTE JSON:
-{{
-    "is_valid": true/false,
-    "completeness_score": 0-100,
-    "issues": ["lista de problemas encontrados"],
-    "summary": "resumo da validação"
-}}
+        # Um único subagente bem-sucedido: o relatório é a própria resposta dele
+        successful = [r for r in state.subagent_responses if r.get("success")]
+        if critic_aggressive and len(state.subagent_responses) == 1 and successful:
+            logger.debug("[NODE] CRITIC: Single successful subagent, skipping LLM validation")
+            return {
+                "validation": {
+                    "is_valid": True,
+                    "completeness_score": 80,
+                    "issues": [],
+                    "summary": "Validação heurística: resposta única de subagente bem-sucedida",
+                }
+            }
 
-Critérios de validação:
-1. O relatório responde à pergunta?
-2. O conteúdo é específico e não genérico?
-3. As informações são coerentes?
-4. O relatório é completo?"""
+        if (
+            critic_aggressive
+            and len(final_report) > 500
+            and sum(1 for marker in _QUALITY_MARKERS if marker.search(final_report)) >= 2
+            and any(d.lower() in report_lower for d in state.active_domains)
+        ):
+            logger.debug("[NODE] CRITIC: Structured report, skipping LLM validation")
+            return {
+                "validation": {
+                    "is_valid": True,
+                    "completeness_score": 80,
+                    "issues": [],
+                    "summary": "Validação heurística: relatório estruturado e aderente aos domínios",
+                }
+            }
 
-        print(f"[NODE] Validating report of length: {len(final_report)}")
+        critic_prompt = _CRITIC_PROMPT.substitute(
+            original_query=state.original_query,
+            normalized_query=state.normalized_query,
+            final_report=final_report,
+        )
 
-        response = llm.invoke([HumanMessage(content=critic_prompt)])
-        content = normalize_llm_content(response.content)
+        logger.debug("[NODE] Validating report of length: %s", len(final_report))
 
-        validation = safe_parse_json(content) or {
+        validation = await ainvoke_json(
+            _CRITIC_SYSTEM, critic_prompt, ValidationResult, get_session(config)
+        ) or {
             "is_valid": True,
             "completeness_score": 70,
             "issues": [],
             "summary": "Validação automática",
         }
 
-        print(f"[NODE] Validation result: is_valid={validation.get('is_valid')}, score={validation.get('completeness_score')}")
+        logger.debug("[NODE] Validation result: is_valid=%s, score=%s", validation.get('is_valid'), validation.get('completeness_score'))
 
         return {"validation": validation}
 
-    def response_node(state: AgentState) -> dict[str, Any]:
-        print("\n[NODE] ========== RESPONSE ==========")
+    async def response_node(state: AgentState, config: RunnableConfig) -> dict[str, Any]:
+        log_banner("RESPONSE")
 
-        final_report = state.get("final_report", "")
-        validation = state.get("validation", {})
+        final_report = state.final_report
+        validation = state.validation
         is_valid = validation.get("is_valid", True)
 
-        print(f"[NODE] Final report length: {len(final_report)}")
-        print(f"[NODE] Validation is_valid: {is_valid}")
-
-        response_prompt = f"""Você é o ResponseAgent, responsável por formatar a resposta final para o usuário.
-
-CONTEXTO COMPLETO:
-- Pergunta original: {state['original_query']}
-- Pergunta normalizada: {state['normalized_query']}
-- Domínios consultados: {', '.join(state.get('sources', []))}
-
-RELATÓRIO CONSOLIDADO DOS AGENTES:
-{final_report}
-
-VALIDAÇÃO DO CRITIC:
-- Válido: {validation.get('is_valid', 'N/A')}
-- Score: {validation.get('completeness_score', 'N/A')}
-- Resumo: {validation.get('summary', 'N/A')}
-
-INSTRUÇÕES:
-1. Formate o relatório consolidado de forma clara e profissional
-2. Use o conteúdo do relatório - NÃO invente informações
-3. NÃO peça mais contexto ou informações
-4. Se o relatório indicar falta de dados, explique isso claramente
-5. Mantenha um tom executivo e objetivo
-
-Gere a resposta final:"""
+        logger.debug("[NODE] Final report length: %s", len(final_report))
+        logger.debug("[NODE] Validation is_valid: %s", is_valid)
+
+        response_prompt = _RESPONSE_PROMPT.substitute(
+            original_query=state.original_query,
+            normalized_query=state.normalized_query,
+            sources=", ".join(state.sources),
+            final_report=final_report,
+            is_valid=validation.get("is_valid", "N/A"),
+            completeness_score=validation.get("completeness_score", "N/A"),
+            summary=validation.get("summary", "N/A"),
+        )
 
-        print(f"[NODE] Response prompt length: {len(response_prompt)}")
+        logger.debug("[NODE] Response prompt length: %s", len(response_prompt))
 
-        response = llm.invoke([HumanMessage(content=response_prompt)])
-        final_text = normalize_llm_content(response.content)
+        # Streaming: tokens chegam ao consumidor (stream_mode="messages") enquanto são gerados
+        final_text = await cached_astream(
+            llm,
+            [SystemMessage(content=_RESPONSE_SYSTEM), HumanMessage(content=response_prompt)],
+            get_session(config),
+            normalize=normalize_llm_content,
+        )
 
-        print(f"[NODE] Final response length: {len(final_text)}")
-        print(f"[NODE] Final response preview: {final_text[:200]}...")
+        logger.debug("[NODE] Final response length: %s", len(final_text))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[NODE] Final response preview: %s...", final_text[:200])
 
-        memory_status = state.get("memory_status", {}).copy()
-        memory_status["resposta_entregue"] = True
+        # Só respostas aprovadas pelo crítico são reaproveitadas em execuções seguintes
+        if is_valid:
+            for r in state.subagent_responses:
+                if r.get("success") and r.get("cache_key"):
+                    _SUBAGENT_CACHE.set(r["cache_key"], r["response"])
 
         return {
             "final_response": final_text,
-            "memory_status": memory_status,
+            "memory_status": {"resposta_entregue": True},
             "messages": [AIMessage(content=final_text)],
         }
 
     def memory_persist_node(state: AgentState) -> dict[str, Any]:
-        print("\n[NODE] ========== MEMORY_PERSIST ==========")
+        log_banner("MEMORY_PERSIST")
 
         if not memory_agent:
-            print("[NODE] No memory agent, skipping")
+            logger.debug("[NODE] No memory agent, skipping")
             return {}
 
-        if not state.get("ambiguity_resolved", False):
-            print("[NODE] Ambiguity not resolved, skipping memory persist")
+        if not state.ambiguity_resolved:
+            logger.debug("[NODE] Ambiguity not resolved, skipping memory persist")
             return {}
 
-        ambiguities = state.get("ambiguity_result", {}).get("ambiguities_detected", [])
-        print(f"[NODE] Persisting {len(ambiguities)} ambiguity resolutions")
+        ambiguities = [
+            (amb.get("term"), amb.get("resolution"), amb.get("domain"))
+            for amb in state.ambiguity_result.get("ambiguities_detected", [])
+            if isinstance(amb, dict) and amb.get("term") and amb.get("resolution")
+        ]
+        if not ambiguities:
+            logger.debug("[NODE] No ambiguity resolutions to persist")
+            return {}
 
-        for amb in ambiguities:
-            memory_agent.memorize_ambiguity_resolution(
-                amb.get("term"), amb.get("resolution"), amb.get("domain")
-            )
+        logger.debug("[NODE] Persisting %s ambiguity resolutions", len(ambiguities))
+
+        # Resultado não é usado adiante: grava em segundo plano e retorna
+        future = _PERSIST_EXECUTOR.submit(memory_agent.memorize_ambiguity_resolutions, ambiguities)
+        future.add_done_callback(_on_persist_done)
 
         return {}
 
     workflow = StateGraph(AgentState)
 
+    workflow.add_node("prelude", prelude_node)
     workflow.add_node("memory_recall", memory_recall_node)
     workflow.add_node("ambiguity_resolver", ambiguity_resolver_node)
     workflow.add_node("planner", planner_node)
+    workflow.add_node("fused_ambiguity_planner", fused_ambiguity_planner_node)
     workflow.add_node("executor", executor_node)
+    workflow.add_node("subagent", subagent_node)
+    workflow.add_node("report", report_node)
     workflow.add_node("visualization", visualization_node)
     workflow.add_node("critic", critic_node)
     workflow.add_node("response", response_node)
     workflow.add_node("memory_persist", memory_persist_node)
 
-    workflow.set_entry_point("memory_recall")
-    workflow.add_edge("memory_recall", "ambiguity_resolver")
-    workflow.add_edge("ambiguity_resolver", "planner")
+    # Fork/join: memory_recall || (ambiguity_resolver -> planner | nó fundido),
+    # subagentes do plano via Send e visualization || critic
+    workflow.add_edge(START, "prelude")
+    workflow.add_conditional_edges(
+        "prelude",
+        route_after_prelude,
+        ["memory_recall", "ambiguity_resolver", "fused_ambiguity_planner"],
+    )
+    workflow.add_edge(["memory_recall", "ambiguity_resolver"], "planner")
     workflow.add_edge("planner", "executor")
-    workflow.add_edge("executor", "visualization")
-    workflow.add_edge("visualization", "critic")
-    workflow.add_edge("critic", "response")
+    workflow.add_edge(["memory_recall", "fused_ambiguity_planner"], "executor")
+    workflow.add_conditional_edges("executor", dispatch_steps, ["subagent", "report"])
+    workflow.add_edge("subagent", "report")
+    workflow.add_edge("report", "visualization")
+    workflow.add_edge("report", "critic")
+    workflow.add_edge(["visualization", "critic"], "response")
     workflow.add_edge("response", "memory_persist")
     workflow.add_edge("memory_persist", END)
 
-    print("[DEBUG] Workflow compiled successfully")
+    logger.debug("Workflow compiled successfully")
 
     return workflow.compile()
 
 
+@lru_cache(maxsize=128)
+def _cached_workflow(
+    user_id: str | None,
+    model_id: str | None,
+    debug_mode: bool,
+    critic_aggressive: bool,
+) -> StateGraph:
+    """
+    Compila o grafo uma única vez por (usuário, modelo, flags).
+
+    A sessão não entra na chave: é injetada a cada execução via
+    config["configurable"]["session"].
+    """
+    return create_langgraph_workflow(None, user_id, model_id, debug_mode, critic_aggressive)
+
+
 class DeepAgentOrchestrator:
     def __init__(
         self,
@@ -671,70 +1276,228 @@ class DeepAgentOrchestrator:
         user_id: str | None = None,
         model_id: str | None = None,
         debug_mode: bool = False,
+        critic_aggressive: bool = CRITIC_AGGRESSIVE,
     ):
         self.session = session
         self.model_id = model_id
         self.debug_mode = debug_mode
-        self.agent = create_langgraph_workflow(session, user_id, model_id, debug_mode)
+        self.agent = _cached_workflow(user_id, model_id, debug_mode, critic_aggressive)
+
+    def _run_config(self, session: SessionContext | None) -> RunnableConfig:
+        # max_concurrency limita os ramos simultâneos do fan-out (evita rate limit)
+        return {
+            "configurable": {"session": session},
+            "max_concurrency": TOOL_CONCURRENCY_LIMIT,
+        }
+
+    def _build_initial_state(
+        self,
+        query: str,
+        active_domains: list[str] | None,
+        group_context: dict[str, Any] | None,
+        session: SessionContext | None,
+    ) -> AgentState:
+        return AgentState(
+            original_query=query,
+            # Até a resolução de ambiguidade, a pergunta normalizada é a original
+            normalized_query=query,
+            active_domains=active_domains or [],
+            group_context=group_context or {},
+            session_id=session.session_id if session else "",
+        )
+
+    @staticmethod
+    def _format_result(result: dict[str, Any]) -> PipelineResult:
+        return PipelineResult(
+            response=result.get("final_response", ""),
+            normalized_query=result.get("normalized_query", ""),
+            final_report=result.get("final_report", ""),
+            validation=result.get("validation", {}),
+            memory_status=result.get("memory_status", {}),
+            sources=result.get("sources", []),
+            visualization_suggestion=result.get("visualization_suggestion"),
+            visualization_data=result.get("visualization_data"),
+        )
+
+    async def aprocess_query(
+        self,
+        query: str,
+        active_domains: list[str] | None = None,
+        group_context: dict[str, Any] | None = None,
+        session: SessionContext | None = None,
+    ) -> PipelineResult:
+        """
+        Executa o pipeline multiagente de forma assíncrona.
+        Permite que servidores async atendam várias perguntas em um mesmo worker.
+
+        A sessão pode ser passada por chamada, permitindo reaproveitar a mesma
+        instância do orquestrador entre requisições; sem ela, usa a do construtor.
+        """
+        session = session or self.session
+        logger.info("Starting multiagent pipeline (model=%s, domains=%s)", self.model_id, active_domains)
+        logger.debug("Query: %s", query)
+
+        initial_state = self._build_initial_state(query, active_domains, group_context, session)
+        result = await self.agent.ainvoke(initial_state, config=self._run_config(session))
+
+        logger.info("Pipeline completed")
+
+        return self._format_result(result)
+
+    async def astream_query(
+        self,
+        query: str,
+        active_domains: list[str] | None = None,
+        group_context: dict[str, Any] | None = None,
+        session: SessionContext | None = None,
+        include_stages: bool = False,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Executa o pipeline emitindo os tokens da resposta final conforme chegam.
+
+        Args:
+            include_stages: Se True, emite também um evento ao fim de cada nó
+
+        Yields:
+            {"type": "stage", "stage": str, "update": dict} ao fim de cada nó
+            (somente com include_stages), {"type": "token", "content": str}
+            para cada chunk do response_node (ou um único com o texto inteiro,
+            se a resposta veio do cache) e, ao final,
+            {"type": "result", "result": PipelineResult}
+        """
+        session = session or self.session
+        logger.info("Starting multiagent pipeline stream (model=%s, domains=%s)", self.model_id, active_domains)
+
+        initial_state = self._build_initial_state(query, active_domains, group_context, session)
+        final_state: dict[str, Any] = {}
+        streamed_tokens = False
+        stream_mode = ["messages", "values", "updates"] if include_stages else ["messages", "values"]
+
+        async for mode, payload in self.agent.astream(
+            initial_state,
+            config=self._run_config(session),
+            stream_mode=stream_mode,
+        ):
+            if mode == "values":
+                final_state = payload
+                continue
+
+            if mode == "updates":
+                for stage, update in payload.items():
+                    yield {"type": "stage", "stage": stage, "update": update or {}}
+                continue
+
+            chunk, metadata = payload
+            # Só fragmentos do llm.astream: o AIMessage final do response_node
+            # também é emitido pelo modo "messages" e duplicaria o texto
+            if metadata.get("langgraph_node") == "response" and isinstance(chunk, AIMessageChunk):
+                content = normalize_llm_content(chunk.content)
+                if content:
+                    streamed_tokens = True
+                    yield {"type": "token", "content": content}
+
+        logger.info("Pipeline completed")
+
+        result = self._format_result(final_state)
+        # Nenhum fragmento transmitido (ex.: resposta do cache): emite o texto inteiro
+        if not streamed_tokens and result.response:
+            yield {"type": "token", "content": result.response}
+
+        yield {"type": "result", "result": result}
+
+    def stream_query(
+        self,
+        query: str,
+        active_domains: list[str] | None = None,
+        group_context: dict[str, Any] | None = None,
+        session: SessionContext | None = None,
+        include_stages: bool = False,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Versão síncrona de astream_query (usada pelo Streamlit com st.write_stream).
+
+        O pipeline roda em um event loop de thread própria; os eventos chegam
+        por fila conforme são emitidos.
+        """
+        events: queue.Queue = queue.Queue()
+        done = object()
+
+        async def produce() -> None:
+            async for event in self.astream_query(
+                query, active_domains, group_context, session, include_stages
+            ):
+                events.put(event)
+
+        def run() -> None:
+            try:
+                asyncio.run(produce())
+            except Exception as e:
+                events.put(e)
+            finally:
+                events.put(done)
+
+        threading.Thread(target=run, name="stream-query", daemon=True).start()
+
+        while (event := events.get()) is not done:
+            if isinstance(event, Exception):
+                raise event
+            yield event
 
     def process_query(
         self,
         query: str,
         active_domains: list[str] | None = None,
         group_context: dict[str, Any] | None = None,
-    ) -> dict[str, Any]:
-        print("\n" + "=" * 60)
-        print("STARTING MULTIAGENT PIPELINE")
-        print("=" * 60)
-        print(f"Query: {query}")
-        print(f"Active domains: {active_domains}")
-        print(f"Model: {self.model_id}")
-        print("=" * 60)
-
-        initial_state: AgentState = {
-            "messages": [],
-            "original_query": query,
-            "normalized_query": "",
-            "active_domains": active_domains or [],
-            "group_context": group_context or {},
-            "user_id": "",
-            "ambiguity_result": {},
-            "ambiguity_resolved": False,
-            "plan": [],
-            "subagent_responses": [],
-            "final_report": "",
-            "validation": {},
-            "final_response": "",
-            "sources": [],
-            "session_id": self.session.session_id if self.session else "",
-            "visualization_requested": False,
-            "visualization_suggestion": None,
-            "visualization_data": None,
-            "memory_context": [],
-            "memory_status": {
-                "contexto_carregado": False,
-                "memoria_consultada": False,
-                "ambiguidade_resolvida": False,
-                "resposta_entregue": False,
-            },
-        }
+        session: SessionContext | None = None,
+    ) -> PipelineResult:
+        """Versão síncrona de aprocess_query (usada pelo Streamlit)."""
+        return asyncio.run(self.aprocess_query(query, active_domains, group_context, session))
 
-        result = self.agent.invoke(initial_state)
+    def process_batch(
+        self,
+        queries: list[str],
+        active_domains: list[str] | None = None,
+        group_context: dict[str, Any] | None = None,
+        session: SessionContext | None = None,
+        max_concurrency: int = BATCH_MAX_CONCURRENCY,
+    ) -> list[PipelineResult]:
+        """
+        Processa várias perguntas concorrentemente em um único event loop.
 
-        print("\n" + "=" * 60)
-        print("PIPELINE COMPLETED")
-        print("=" * 60)
+        Args:
+            queries: Perguntas do usuário
+            active_domains: Domínios ativos (comuns a todas as perguntas)
+            group_context: Contexto do grupo
+            session: Sessão da execução (opcional)
+            max_concurrency: Máximo de perguntas em execução ao mesmo tempo
 
-        return {
-            "response": result.get("final_response", ""),
-            "normalized_query": result.get("normalized_query", ""),
-            "final_report": result.get("final_report", ""),
-            "validation": result.get("validation", {}),
-            "memory_status": result.get("memory_status", {}),
-            "sources": result.get("sources", []),
-            "visualization_suggestion": result.get("visualization_suggestion"),
-            "visualization_data": result.get("visualization_data"),
-        }
+        Returns:
+            Resultados na mesma ordem das perguntas
+        """
+        async def run_all() -> list[PipelineResult]:
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def run(query: str) -> PipelineResult:
+                async with semaphore:
+                    return await self.aprocess_query(query, active_domains, group_context, session)
+
+            return await asyncio.gather(*[run(query) for query in queries])
+
+        return asyncio.run(run_all())
+
+
+@lru_cache(maxsize=16)
+def get_shared_orchestrator(
+    user_id: str | None = None,
+    model_id: str | None = None,
+) -> DeepAgentOrchestrator:
+    """
+    Orquestrador compartilhado por (usuário, modelo), sem sessão própria.
+
+    Para servidores que atendem várias requisições: a sessão de cada uma é
+    passada em process_query/aprocess_query/astream_query(session=...).
+    """
+    return DeepAgentOrchestrator(user_id=user_id, model_id=model_id)
 
 
 def create_deep_orchestrator_instance(
@@ -742,10 +1505,12 @@ def create_deep_orchestrator_instance(
     user_id: str | None = None,
     model_id: str | None = None,
     debug_mode: bool = False,
+    critic_aggressive: bool = CRITIC_AGGRESSIVE,
 ) -> DeepAgentOrchestrator:
     return DeepAgentOrchestrator(
         session=session,
         user_id=user_id,
         model_id=model_id,
         debug_mode=debug_mode,
+        critic_aggressive=critic_aggressive,
     )
@@ -0,0 +1,186 @@
+"""
+Parsing de JSON retornado pelos LLMs.
+
+Usa pysimdjson quando disponível (parsing lazy: só os campos lidos são
+convertidos para objetos Python), depois o loads de app.utils.serialization
+(orjson ou o json da stdlib) caso não esteja instalado ou em erro de parsing.
+"""
+
+import json
+import logging
+import re
+import threading
+from typing import Any
+
+from app.utils.serialization import loads
+
+logger = logging.getLogger(__name__)
+
+try:
+    import simdjson
+
+    SIMDJSON_AVAILABLE = True
+except ImportError:
+    simdjson = None
+    SIMDJSON_AVAILABLE = False
+    logger.warning("pysimdjson not installed. Using orjson/stdlib json.")
+
+# Bloco ```json ... ``` tem prioridade; senão, do primeiro "{" ao último "}"
+_JSON_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```|(\{.*\})", re.DOTALL)
+
+# simdjson.Parser não é thread-safe e só mantém um documento vivo por vez
+_local = threading.local()
+
+
+def _get_parser() -> Any:
+    """Retorna o parser simdjson da thread atual."""
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = simdjson.Parser()
+        _local.parser = parser
+    return parser
+
+
+def _to_python(value: Any) -> Any:
+    """Converte valores lazy do simdjson para tipos Python."""
+    if isinstance(value, simdjson.Object):
+        return value.as_dict()
+    if isinstance(value, simdjson.Array):
+        return value.as_list()
+    return value
+
+
+class JsonObjectScanner:
+    """
+    Acompanha um texto em streaming e detecta quando o primeiro objeto
+    JSON de topo foi fechado, permitindo encerrar a geração mais cedo.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.closed = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Processa um trecho do texto.
+
+        Args:
+            chunk: Novo trecho recebido
+
+        Returns:
+            True quando o objeto JSON de topo foi fechado
+        """
+        if self.closed:
+            return True
+
+        for ch in chunk:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"' and self.started:
+                self._in_string = True
+            elif ch == "{":
+                self.started = True
+                self.depth += 1
+            elif ch == "}" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.closed = True
+                    return True
+
+        return False
+
+
+def extract_json_block(text: str) -> str | None:
+    """
+    Extrai o bloco JSON de um texto livre retornado pelo LLM.
+
+    Args:
+        text: Texto do LLM
+
+    Returns:
+        Trecho com o objeto JSON ou None se não houver
+    """
+    if not text:
+        return None
+
+    match = _JSON_RE.search(text)
+    if not match:
+        return None
+
+    return match.group(1) or match.group(2)
+
+
+_DECODER = json.JSONDecoder()
+
+
+def decode_first_object(text: str) -> dict[str, Any] | None:
+    """
+    Retorna o primeiro objeto JSON válido do texto.
+
+    Decodifica a partir de cada "{" com raw_decode (decoder em C), então
+    ignora prosa antes do JSON e para no primeiro objeto completo em vez
+    de depender do último "}" do texto.
+
+    Args:
+        text: Texto do LLM
+
+    Returns:
+        Primeiro objeto JSON encontrado ou None
+    """
+    if not text:
+        return None
+
+    i = text.find("{")
+    while i != -1:
+        try:
+            obj, _ = _DECODER.raw_decode(text, i)
+        except json.JSONDecodeError:
+            i = text.find("{", i + 1)
+            continue
+        if isinstance(obj, dict):
+            return obj
+        i = text.find("{", i + 1)
+
+    return None
+
+
+def loads_object(payload: str, keys: tuple[str, ...] | None = None) -> dict[str, Any] | None:
+    """
+    Faz o parsing de um objeto JSON.
+
+    Args:
+        payload: Texto contendo somente o objeto JSON
+        keys: Se informado, converte apenas estas chaves de topo
+
+    Returns:
+        Dicionário resultante ou None se o payload não for um objeto
+    """
+    if SIMDJSON_AVAILABLE:
+        try:
+            doc = _get_parser().parse(payload.encode("utf-8"))
+            if not isinstance(doc, simdjson.Object):
+                return None
+            if keys is None:
+                return doc.as_dict()
+            return {key: _to_python(doc[key]) for key in keys if key in doc}
+        except (ValueError, RuntimeError):
+            pass
+
+    try:
+        parsed = loads(payload)
+    except ValueError:
+        return None
+
+    if not isinstance(parsed, dict):
+        return None
+    if keys is None:
+        return parsed
+    return {key: parsed[key] for key in keys if key in parsed}
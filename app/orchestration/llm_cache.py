@@ -0,0 +1,237 @@
+"""
+Cache determinístico de respostas do LLM.
+
+Chamadas com temperature=0 são determinísticas para o mesmo modelo e as
+mesmas mensagens, então a resposta pode ser reaproveitada sem nova ida
+ao provedor. A chave é um SHA-256 de (modelo, mensagens, temperatura).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from app.governance.logging import SessionContext
+from app.orchestration.json_utils import JsonObjectScanner
+from app.utils.serialization import dumps_sorted
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", "3600"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "512"))
+
+
+class LLMCache:
+    """Cache LRU com TTL para respostas do LLM."""
+
+    def __init__(
+        self,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Any | None:
+        """
+        Retorna a resposta em cache, se existir e não tiver expirado.
+
+        Args:
+            key: Chave da chamada
+
+        Returns:
+            Resposta em cache ou None
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.stats["misses"] += 1
+                return None
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Armazena uma resposta, descartando a menos usada se cheio."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Limpa o cache e zera as estatísticas."""
+        with self._lock:
+            self._entries.clear()
+            self.stats = {"hits": 0, "misses": 0}
+
+
+def _resolve_binding(llm: Any) -> Any:
+    """Retorna o primeiro passo do runnable (desembrulha with_structured_output)."""
+    return getattr(llm, "first", llm)
+
+
+def _resolve_model(llm: Any) -> Any:
+    """Retorna o modelo subjacente (desembrulha bind_tools/with_structured_output)."""
+    return getattr(_resolve_binding(llm), "bound", _resolve_binding(llm))
+
+
+def _is_cacheable(llm: Any) -> bool:
+    """Somente chamadas com temperature=0 são cacheáveis."""
+    temperature = getattr(_resolve_model(llm), "temperature", None)
+    return temperature is not None and float(temperature) == 0
+
+
+def make_cache_key(llm: Any, messages: list[BaseMessage]) -> str:
+    """
+    Gera a chave SHA-256 de uma chamada ao LLM.
+
+    Args:
+        llm: Modelo (ou modelo com ferramentas/saída estruturada vinculadas)
+        messages: Mensagens enviadas
+
+    Returns:
+        Hash hexadecimal da chamada
+    """
+    model = _resolve_model(llm)
+    binding_kwargs = getattr(_resolve_binding(llm), "kwargs", {})
+    payload = {
+        "model": getattr(model, "model_name", None) or getattr(model, "endpoint", None) or type(model).__name__,
+        "messages": [(m.type, m.content) for m in messages],
+        "temperature": 0,
+        "tools": sorted(
+            str(t.get("function", {}).get("name", t)) if isinstance(t, dict) else str(t)
+            for t in binding_kwargs.get("tools", [])
+        ),
+        "response_format": str(binding_kwargs.get("response_format", "")),
+    }
+    raw = dumps_sorted(payload)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _log_cache(session: SessionContext | None, hit: bool, key: str) -> None:
+    if session:
+        session.log_event(
+            "llm_cache",
+            f"LLM cache {'hit' if hit else 'miss'}",
+            {"key": key[:16], "hit": hit, **_llm_cache.stats},
+        )
+
+
+def cached_invoke(
+    llm: Any,
+    messages: list[BaseMessage],
+    session: SessionContext | None = None,
+) -> Any:
+    """
+    Invoca o LLM reaproveitando respostas de chamadas idênticas.
+
+    Args:
+        llm: Modelo LangChain
+        messages: Mensagens enviadas
+        session: Contexto de sessão para log (opcional)
+
+    Returns:
+        Resposta do LLM (do cache ou da chamada)
+    """
+    if not _is_cacheable(llm):
+        return llm.invoke(messages)
+
+    key = make_cache_key(llm, messages)
+    cached = _llm_cache.get(key)
+    _log_cache(session, cached is not None, key)
+    if cached is not None:
+        return cached
+
+    response = llm.invoke(messages)
+    _llm_cache.set(key, response)
+    return response
+
+
+async def cached_ainvoke(
+    llm: Any,
+    messages: list[BaseMessage],
+    session: SessionContext | None = None,
+) -> Any:
+    """Versão assíncrona de cached_invoke."""
+    if not _is_cacheable(llm):
+        return await llm.ainvoke(messages)
+
+    key = make_cache_key(llm, messages)
+    cached = _llm_cache.get(key)
+    _log_cache(session, cached is not None, key)
+    if cached is not None:
+        return cached
+
+    response = await llm.ainvoke(messages)
+    _llm_cache.set(key, response)
+    return response
+
+
+async def cached_astream(
+    llm: Any,
+    messages: list[BaseMessage],
+    session: SessionContext | None = None,
+    until_json: bool = False,
+    normalize: Callable[[Any], str] = str,
+) -> str:
+    """
+    Invoca o LLM em streaming e acumula o texto gerado.
+
+    Os tokens passam por llm.astream, então quem consome o grafo com
+    stream_mode="messages" recebe a resposta enquanto ela é gerada.
+
+    Args:
+        llm: Modelo LangChain
+        messages: Mensagens enviadas
+        session: Contexto de sessão para log (opcional)
+        until_json: Encerra o stream assim que o primeiro objeto JSON fechar
+        normalize: Função que converte o conteúdo de cada chunk em texto
+
+    Returns:
+        Texto acumulado (do cache ou do stream)
+    """
+    cacheable = _is_cacheable(llm)
+    key = make_cache_key(llm, messages) if cacheable else ""
+    if cacheable:
+        cached = _llm_cache.get(key)
+        _log_cache(session, cached is not None, key)
+        if cached is not None:
+            return normalize(cached.content)
+
+    chunks: list[str] = []
+    scanner = JsonObjectScanner() if until_json else None
+    async for chunk in llm.astream(messages):
+        text = normalize(chunk.content)
+        chunks.append(text)
+        if scanner and scanner.feed(text):
+            break
+
+    content = "".join(chunks)
+    if cacheable:
+        _llm_cache.set(key, AIMessage(content=content))
+    return content
+
+
+_llm_cache = LLMCache()
+
+
+def get_llm_cache() -> LLMCache:
+    """Retorna a instância singleton do cache de LLM."""
+    return _llm_cache
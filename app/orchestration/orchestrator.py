@@ -3,25 +3,36 @@ Orquestrador principal da plataforma multiagente.
 Coordena a execução dos subagentes e agentes de orquestração.
 """
 
+import asyncio
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from app.agents.cadastro.agent import create_cadastro_agent
 from app.agents.financeiro.agent import create_financeiro_agent
 from app.agents.rentabilidade.agent import create_rentabilidade_agent
+from app.config.agents import get_theme_config
 from app.governance.logging import SessionContext, get_governance_manager
 from app.orchestration.critic import create_critic_agent
 from app.orchestration.planner import create_planner_agent
-from app.orchestration.response import create_response_agent
+from app.orchestration.response import create_response_agent, create_template_response_agent
+from app.tools.databricks_tools import prefetch_table_schemas
 
 
 class Orchestrator:
     """Orquestrador principal que coordena todos os agentes."""
 
-    def __init__(self, session: SessionContext | None = None):
+    def __init__(
+        self,
+        session: SessionContext | None = None,
+        max_parallel_agents: int = 4,
+    ):
         self.session = session or get_governance_manager().create_session()
+        self.max_parallel_agents = max_parallel_agents
         self.planner = create_planner_agent(self.session)
         self.critic = create_critic_agent(self.session)
         self.response_agent = create_response_agent(self.session)
+        self.template_response_agent = create_template_response_agent(self.session)
 
         self.subagents = {
             "cadastro": create_cadastro_agent(self.session),
@@ -29,10 +40,52 @@ class Orchestrator:
             "rentabilidade": create_rentabilidade_agent(self.session),
         }
 
+    @staticmethod
+    def _uses_template_response(plan: list[dict[str, Any]]) -> bool:
+        """Plano simples de domínio único: sem crítico e sem formatação por LLM."""
+        return any(step["agent"] == "TemplateResponseAgent" for step in plan)
+
+    @staticmethod
+    def _skipped_validation(responses: list[dict[str, Any]]) -> dict[str, Any]:
+        """Validação registrada quando o crítico é dispensado."""
+        return {
+            "is_valid": any(r.get("success", True) for r in responses),
+            "completeness_score": None,
+            "issues": [],
+            "suggestions": [],
+            "summary": "Validação dispensada: pergunta simples de um único domínio.",
+        }
+
     def _get_agent_for_domain(self, domain: str):
         """Retorna o agente apropriado para um domínio."""
         return self.subagents.get(domain.lower())
 
+    def _prefetch_plan_tables(self, plan: list[dict[str, Any]]) -> None:
+        """Antecipa o schema das tabelas dos domínios do plano."""
+        tables: list[str] = []
+        for step in plan:
+            config = get_theme_config(step.get("domain", ""))
+            if config and config.tables:
+                tables.extend(config.tables)
+        if tables:
+            prefetch_table_schemas(tables)
+
+    def _run_step(self, query: str, step: dict[str, Any], agent) -> dict[str, Any]:
+        """Executa um passo, reaproveitando resposta já dada na sessão."""
+        domain = step.get("domain", "")
+        # Mesmo domínio e mesma pergunta já respondidos nesta sessão
+        cached = self.session.get_answered_step(domain, query)
+        if cached is not None:
+            step["status"] = "completed"
+            return cached
+
+        step["status"] = "in_progress"
+        result = agent.invoke(query)
+        step["status"] = "completed"
+        if result.get("success"):
+            self.session.record_answered_step(domain, query, result)
+        return result
+
     def execute_plan(
         self,
         query: str,
@@ -41,31 +94,34 @@ class Orchestrator:
         """
         Executa o plano de ações.
 
+        Os subagentes de domínios diferentes são independentes (I/O de rede
+        para LLM e Databricks), então rodam em paralelo em threads.
+
         Args:
             query: Pergunta original
             plan: Plano de execução
 
         Returns:
-            Lista de respostas dos subagentes
+            Lista de respostas dos subagentes, na ordem do plano
         """
-        responses = []
-
-        for step in plan:
-            domain = step.get("domain", "")
-            agent = self._get_agent_for_domain(domain)
-
-            if agent:
-                step["status"] = "in_progress"
-                result = agent.invoke(query)
-                step["status"] = "completed"
-                responses.append(result)
-
-        return responses
+        steps = [
+            (step, agent)
+            for step in plan
+            if (agent := self._get_agent_for_domain(step.get("domain", "")))
+        ]
+        if not steps:
+            return []
+
+        max_workers = min(self.max_parallel_agents, len(steps))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._run_step, query, step, agent) for step, agent in steps]
+            return [future.result() for future in futures]
 
     def process_query(
         self,
         query: str,
         chat_history: list | None = None,
+        theme: str | None = None,
     ) -> dict[str, Any]:
         """
         Processa uma pergunta do usuário através do pipeline completo.
@@ -73,18 +129,29 @@ class Orchestrator:
         Args:
             query: Pergunta do usuário
             chat_history: Histórico de mensagens
+            theme: Tema já escolhido pelo usuário; se for um subagente conhecido,
+                vai direto a ele sem planner, crítico e formatação
 
         Returns:
             Dicionário com resposta completa e metadados
         """
+        if theme and theme.lower() in self.subagents:
+            return self.process_single_theme(query, theme, chat_history)
+
         self.session.log_user_query(query)
 
         planning_result = self.planner.invoke(query)
         analysis = planning_result["analysis"]
         plan = planning_result["plan"]
 
+        self._prefetch_plan_tables(plan)
         responses = self.execute_plan(query, plan)
 
+        if self._uses_template_response(plan):
+            final_response = self.template_response_agent.format_response(query, responses, plan)
+            validation = self._skipped_validation(responses)
+            return self._build_result(analysis, plan, responses, validation, final_response)
+
         validation = self.critic.invoke(query, responses)
 
         final_response = self.response_agent.invoke(
@@ -94,7 +161,62 @@ class Orchestrator:
             validation,
         )
 
-        result = {
+        return self._build_result(analysis, plan, responses, validation, final_response)
+
+    async def aexecute_plan(
+        self,
+        query: str,
+        plan: list[dict[str, Any]],
+    ) -> list[dict[str, Any]]:
+        """
+        Versão assíncrona de execute_plan: um ramo por subagente via asyncio.gather.
+
+        O laço de ferramentas dos subagentes é síncrono, então cada um roda em
+        thread própria.
+        """
+        steps = [
+            (step, agent)
+            for step in plan
+            if (agent := self._get_agent_for_domain(step.get("domain", "")))
+        ]
+        if not steps:
+            return []
+
+        semaphore = asyncio.Semaphore(self.max_parallel_agents)
+
+        async def run(step: dict[str, Any], agent) -> dict[str, Any]:
+            async with semaphore:
+                return await asyncio.to_thread(self._run_step, query, step, agent)
+
+        return list(await asyncio.gather(*(run(step, agent) for step, agent in steps)))
+
+    async def _arun_pipeline(self, query: str) -> tuple[Any, ...]:
+        """Planejamento, subagentes e validação do caminho assíncrono."""
+        self.session.log_user_query(query)
+
+        planning_result = await self.planner.ainvoke(query)
+        analysis = planning_result["analysis"]
+        plan = planning_result["plan"]
+
+        self._prefetch_plan_tables(plan)
+        responses = await self.aexecute_plan(query, plan)
+
+        if self._uses_template_response(plan):
+            return analysis, plan, responses, self._skipped_validation(responses)
+
+        validation = await asyncio.to_thread(self.critic.invoke, query, responses)
+        return analysis, plan, responses, validation
+
+    def _build_result(
+        self,
+        analysis: dict[str, Any],
+        plan: list[dict[str, Any]],
+        responses: list[dict[str, Any]],
+        validation: dict[str, Any],
+        final_response: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Consolida o resultado no formato de process_query."""
+        return {
             "response": final_response["response"],
             "plan": plan,
             "analysis": analysis,
@@ -104,7 +226,56 @@ class Orchestrator:
             "session_id": self.session.session_id,
         }
 
-        return result
+    async def aprocess_query(self, query: str) -> dict[str, Any]:
+        """
+        Versão assíncrona de process_query.
+
+        Planner e formatação usam ainvoke; a validação do crítico é síncrona
+        e roda em thread para não bloquear o event loop.
+        """
+        analysis, plan, responses, validation = await self._arun_pipeline(query)
+
+        if self._uses_template_response(plan):
+            final_response = self.template_response_agent.format_response(query, responses, plan)
+            return self._build_result(analysis, plan, responses, validation, final_response)
+
+        final_response = await self.response_agent.ainvoke(
+            query,
+            responses,
+            plan,
+            validation,
+        )
+
+        return self._build_result(analysis, plan, responses, validation, final_response)
+
+    async def astream_query(self, query: str) -> AsyncIterator[dict[str, Any]]:
+        """
+        Versão de aprocess_query que emite os tokens da resposta final.
+
+        Yields:
+            {"type": "token", "content": str} para cada chunk da formatação e,
+            ao final, {"type": "result", "result": dict} no formato de process_query
+        """
+        analysis, plan, responses, validation = await self._arun_pipeline(query)
+
+        if self._uses_template_response(plan):
+            final_response = self.template_response_agent.format_response(query, responses, plan)
+            yield {"type": "token", "content": final_response["response"]}
+            yield {
+                "type": "result",
+                "result": self._build_result(analysis, plan, responses, validation, final_response),
+            }
+            return
+
+        async for event in self.response_agent.astream_response(query, responses, plan, validation):
+            if event["type"] == "token":
+                yield event
+                continue
+
+            yield {
+                "type": "result",
+                "result": self._build_result(analysis, plan, responses, validation, event["result"]),
+            }
 
     def process_single_theme(
         self,
@@ -0,0 +1,141 @@
+"""
+Cache semântico da análise do PlannerAgent.
+
+Perguntas parafraseadas ("vendas do mês" / "faturamento mensal") levam à
+mesma análise de domínios. Cada análise é guardada com o embedding
+normalizado da pergunta; a busca é um único produto matriz-vetor em NumPy
+e, acima do limiar de similaridade, a chamada ao LLM é evitada.
+"""
+
+import logging
+import os
+import threading
+from functools import cache
+from typing import Any
+
+import numpy as np
+from langchain_openai import OpenAIEmbeddings
+
+logger = logging.getLogger(__name__)
+
+# Análise só escolhe domínios: paráfrases próximas compartilham o resultado
+ANALYSIS_CACHE_THRESHOLD = float(os.environ.get("ANALYSIS_CACHE_THRESHOLD", "0.87"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", "1024"))
+
+
+@cache
+def _get_embedder() -> OpenAIEmbeddings:
+    """Modelo de embeddings compartilhado (o mesmo da memória de longo prazo)."""
+    return OpenAIEmbeddings(model="text-embedding-3-small")
+
+
+class _ModelStore:
+    """Buffer circular de (embedding, análise) de um modelo."""
+
+    def __init__(self, dim: int, max_entries: int):
+        self.matrix = np.zeros((max_entries, dim), dtype=np.float32)
+        self.results: list[dict[str, Any] | None] = [None] * max_entries
+        self.size = 0
+        self.next = 0
+
+
+class SemanticAnalysisCache:
+    """Cache de análises por similaridade de cosseno, separado por modelo."""
+
+    def __init__(
+        self,
+        threshold: float = ANALYSIS_CACHE_THRESHOLD,
+        max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._stores: dict[str, _ModelStore] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _normalize(vector: list[float]) -> np.ndarray | None:
+        """Converte para vetor unitário float32 (None se o vetor for nulo)."""
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else None
+
+    @classmethod
+    def embed(cls, query: str) -> np.ndarray | None:
+        """
+        Gera o embedding normalizado da pergunta.
+
+        Args:
+            query: Pergunta do usuário
+
+        Returns:
+            Vetor unitário ou None se o modelo de embeddings falhar
+        """
+        try:
+            return cls._normalize(_get_embedder().embed_query(query))
+        except Exception as e:
+            logger.warning(f"Could not embed query for analysis cache: {e}")
+            return None
+
+    @classmethod
+    async def aembed(cls, query: str) -> np.ndarray | None:
+        """Versão assíncrona de embed."""
+        try:
+            return cls._normalize(await _get_embedder().aembed_query(query))
+        except Exception as e:
+            logger.warning(f"Could not embed query for analysis cache: {e}")
+            return None
+
+    def get(self, model: str, embedding: np.ndarray) -> dict[str, Any] | None:
+        """
+        Retorna a análise mais próxima acima do limiar.
+
+        Args:
+            model: Modelo que gerou as análises
+            embedding: Embedding normalizado da pergunta
+
+        Returns:
+            Análise em cache ou None
+        """
+        with self._lock:
+            store = self._stores.get(model)
+            if store is None or store.size == 0 or store.matrix.shape[1] != embedding.shape[0]:
+                self.stats["misses"] += 1
+                return None
+
+            scores = store.matrix[: store.size] @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["hits"] += 1
+            logger.info(f"Analysis cache hit (similarity={scores[best]:.3f})")
+            return store.results[best]
+
+    def set(self, model: str, embedding: np.ndarray, analysis: dict[str, Any]) -> None:
+        """Armazena a análise, sobrescrevendo a mais antiga quando cheio."""
+        with self._lock:
+            store = self._stores.get(model)
+            if store is None or store.matrix.shape[1] != embedding.shape[0]:
+                store = _ModelStore(embedding.shape[0], self.max_entries)
+                self._stores[model] = store
+
+            store.matrix[store.next] = embedding
+            store.results[store.next] = analysis
+            store.next = (store.next + 1) % self.max_entries
+            store.size = min(store.size + 1, self.max_entries)
+
+    def clear(self) -> None:
+        """Limpa o cache e zera as estatísticas."""
+        with self._lock:
+            self._stores.clear()
+            self.stats = {"hits": 0, "misses": 0}
+
+
+_analysis_cache = SemanticAnalysisCache()
+
+
+def get_analysis_cache() -> SemanticAnalysisCache:
+    """Retorna a instância singleton do cache de análises."""
+    return _analysis_cache
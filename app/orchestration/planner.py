@@ -13,9 +13,48 @@ from typing import Any
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, Field
 
 from app.config.agents import PLANNER_AGENT_CONFIG, get_available_themes
+from app.config.http_clients import get_http_client
 from app.governance.logging import SessionContext
+from app.orchestration.json_utils import decode_first_object, extract_json_block, loads_object
+from app.orchestration.llm_cache import cached_ainvoke, cached_invoke
+from app.orchestration.plan_cache import get_analysis_cache
+
+
+class AnalysisResult(BaseModel):
+    """Contrato de saída estruturada da análise do planner."""
+
+    domains: list[str] = Field(default_factory=list)
+    is_complex: bool = False
+    execution_order: list[str] = Field(default_factory=list)
+    reasoning: str = ""
+
+
+# Clientes compartilhados por (modelo, temperatura): reaproveita pool HTTP e TLS
+_LLM_CACHE: dict[tuple[str, float], ChatOpenAI] = {}
+
+# Instruções e formato de saída constantes: vão inteiros na SystemMessage,
+# a HumanMessage leva só a pergunta
+_ANALYSIS_SYSTEM = f"""{PLANNER_AGENT_CONFIG.system_prompt}
+
+Analise a pergunta do usuário e identifique:
+1. Quais domínios de dados são necessários para responder
+2. Se a pergunta é simples (um domínio) ou complexa (múltiplos domínios)
+3. A ordem de execução recomendada
+
+Domínios disponíveis: {', '.join(get_available_themes())}
+
+Responda SOMENTE com um JSON válido:
+{{
+  "domains": ["lista de domínios necessários"],
+  "is_complex": true/false,
+  "execution_order": ["ordem de execução dos domínios"],
+  "reasoning": "explicação da análise"
+}}"""
+
+_ANALYSIS_SYSTEM_MESSAGE = SystemMessage(content=_ANALYSIS_SYSTEM)
 
 
 class PlannerAgent:
@@ -30,6 +69,7 @@ class PlannerAgent:
         self.session = session
         self.model_name = model_name
         self._llm = None
+        self._structured_llm = None
 
     # ------------------------------------------------------------------
     # LLM
@@ -38,12 +78,23 @@ class PlannerAgent:
     def llm(self) -> ChatOpenAI:
         """Retorna instância do LLM lazy-loaded."""
         if self._llm is None:
-            self._llm = ChatOpenAI(
-                model=self.model_name,
-                temperature=0,
-            )
+            key = (self.model_name, 0.0)
+            if key not in _LLM_CACHE:
+                _LLM_CACHE[key] = ChatOpenAI(
+                    model=self.model_name,
+                    temperature=0,
+                    http_client=get_http_client(),
+                )
+            self._llm = _LLM_CACHE[key]
         return self._llm
 
+    @property
+    def structured_llm(self):
+        """LLM com saída estruturada no schema AnalysisResult."""
+        if self._structured_llm is None:
+            self._structured_llm = self.llm.with_structured_output(AnalysisResult)
+        return self._structured_llm
+
     # ------------------------------------------------------------------
     # Helpers internos (CRÍTICOS)
     # ------------------------------------------------------------------
@@ -53,25 +104,19 @@ class PlannerAgent:
         Normaliza QUALQUER retorno do LLM para string.
         Pode receber: str | list | dict | None
         """
-        if content is None:
-            return ""
-
-        if isinstance(content, str):
+        # Caminho rápido: quase toda resposta é str
+        content_type = type(content)
+        if content_type is str:
             return content
 
-        if isinstance(content, list):
-            parts: list[str] = []
-            for item in content:
-                if isinstance(item, dict):
-                    parts.append(
-                        str(item.get("text") or item.get("content") or item)
-                    )
-                else:
-                    parts.append(str(item))
-            return "\n".join(parts)
+        if content is None:
+            return ""
 
-        if isinstance(content, dict):
-            return str(content)
+        if content_type is list:
+            return "\n".join([
+                str(item.get("text") or item.get("content") or item) if type(item) is dict else str(item)
+                for item in content
+            ])
 
         return str(content)
 
@@ -81,117 +126,151 @@ class PlannerAgent:
         Extrai JSON de texto livre de forma defensiva.
         Nunca lança exceção.
         """
-        import json
-
         if not text:
             return None
 
-        try:
-            start = text.find("{")
-            end = text.rfind("}") + 1
-
-            if start == -1 or end <= start:
-                return None
-
-            parsed = json.loads(text[start:end])
-            return parsed if isinstance(parsed, dict) else None
+        # Caminho rápido: regex compilada + orjson/simdjson sobre o bloco JSON
+        payload = extract_json_block(text)
+        parsed = loads_object(payload) if payload else None
+        if parsed is not None:
+            return parsed
 
-        except Exception:
-            return None
+        # Primeiro objeto completo (raw_decode): prosa com "}" após o JSON não quebra o parsing
+        return decode_first_object(text)
 
     # ------------------------------------------------------------------
     # Core
     # ------------------------------------------------------------------
+    @staticmethod
+    def _analysis_messages(query: str) -> list:
+        # Prefixo estático idêntico entre chamadas (cache de prompt do provedor)
+        return [
+            _ANALYSIS_SYSTEM_MESSAGE,
+            HumanMessage(content=f"Pergunta: {query}"),
+        ]
+
+    def _finish_analysis(self, response: Any, embedding: Any) -> dict[str, Any]:
+        """Extrai a análise do texto do LLM, com fallback seguro."""
+        content = self._normalize_llm_content(
+            getattr(response, "content", response)
+        )
+
+        parsed = self._safe_parse_json(content)
+
+        if parsed:
+            if embedding is not None:
+                get_analysis_cache().set(self.model_name, embedding, parsed)
+            return parsed
+
+        # Fallback seguro
+        available_themes = get_available_themes()
+        default_domain = available_themes[:1] if available_themes else []
+        return {
+            "domains": default_domain,
+            "is_complex": False,
+            "execution_order": default_domain,
+            "reasoning": content or "Fallback: análise não estruturada.",
+        }
+
     def analyze_query(self, query: str) -> dict[str, Any]:
         """
         Analisa a pergunta e identifica os domínios necessários.
         """
-        available_themes = get_available_themes()
+        # Pergunta parafraseada de outra já analisada: dispensa o LLM
+        analysis_cache = get_analysis_cache()
+        embedding = analysis_cache.embed(query)
+        if embedding is not None:
+            cached = analysis_cache.get(self.model_name, embedding)
+            if cached is not None:
+                return cached
 
-        analysis_prompt = f"""
-Analise a seguinte pergunta e identifique:
-1. Quais domínios de dados são necessários para responder
-2. Se a pergunta é simples (um domínio) ou complexa (múltiplos domínios)
-3. A ordem de execução recomendada
+        messages = self._analysis_messages(query)
 
-Domínios disponíveis: {', '.join(available_themes)}
-
-Pergunta: {query}
-
-Responda SOMENTE com um JSON válido:
-{{
-  "domains": ["lista de domínios necessários"],
-  "is_complex": true/false,
-  "execution_order": ["ordem de execução dos domínios"],
-  "reasoning": "explicação da análise"
-}}
-""".strip()
+        try:
+            result = cached_invoke(self.structured_llm, messages, self.session)
+            analysis = result.model_dump()
+            if embedding is not None:
+                analysis_cache.set(self.model_name, embedding, analysis)
+            return analysis
+        except Exception:
+            # Provider sem suporte a saída estruturada: parsing defensivo do texto
+            response = cached_invoke(self.llm, messages, self.session)
 
-        messages = [
-            SystemMessage(content=self.config.system_prompt),
-            HumanMessage(content=analysis_prompt),
-        ]
+        return self._finish_analysis(response, embedding)
 
-        response = self.llm.invoke(messages)
-        content = self._normalize_llm_content(
-            getattr(response, "content", response)
-        )
+    async def aanalyze_query(self, query: str) -> dict[str, Any]:
+        """Versão assíncrona de analyze_query."""
+        analysis_cache = get_analysis_cache()
+        embedding = await analysis_cache.aembed(query)
+        if embedding is not None:
+            cached = analysis_cache.get(self.model_name, embedding)
+            if cached is not None:
+                return cached
 
-        parsed = self._safe_parse_json(content)
+        messages = self._analysis_messages(query)
 
-        if parsed:
-            analysis = parsed
-        else:
-            # Fallback seguro
-            default_domain = available_themes[:1] if available_themes else []
-            analysis = {
-                "domains": default_domain,
-                "is_complex": False,
-                "execution_order": default_domain,
-                "reasoning": content or "Fallback: análise não estruturada.",
-            }
+        try:
+            result = await cached_ainvoke(self.structured_llm, messages, self.session)
+            analysis = result.model_dump()
+            if embedding is not None:
+                analysis_cache.set(self.model_name, embedding, analysis)
+            return analysis
+        except Exception:
+            response = await cached_ainvoke(self.llm, messages, self.session)
 
-        return analysis
+        return self._finish_analysis(response, embedding)
 
     # ------------------------------------------------------------------
     def create_plan(self, query: str, analysis: dict[str, Any]) -> list[dict[str, Any]]:
         """
         Cria um plano de execução baseado na análise.
         """
-        plan: list[dict[str, Any]] = []
-
         domains = analysis.get(
             "execution_order",
             analysis.get("domains", []),
         )
 
-        for i, domain in enumerate(domains, 1):
-            plan.append({
+        n = len(domains)
+        # Trecho da pergunta comum a todos os passos: montado uma única vez
+        task_suffix = f" para responder: {query}"
+        plan: list[dict[str, Any]] = [
+            {
                 "step": i,
-                "agent": f"{domain.capitalize()}Agent",
+                "agent": domain.capitalize() + "Agent",
                 "domain": domain,
-                "task": f"Consultar dados de {domain} para responder: {query}",
+                "task": "Consultar dados de " + domain + task_suffix,
                 "status": "pending",
-            })
-
-        plan.append({
-            "step": len(plan) + 1,
-            "agent": "CriticAgent",
-            "domain": "validation",
-            "task": "Validar consistência e completude das respostas",
-            "status": "pending",
-        })
-
-        plan.append({
-            "step": len(plan) + 1,
-            "agent": "ResponseAgent",
-            "domain": "response",
-            "task": "Formatar resposta final para o usuário",
-            "status": "pending",
-        })
+            }
+            for i, domain in enumerate(domains, 1)
+        ]
 
-        if self.session:
-            self.session.log_plan([step["task"] for step in plan])
+        # Pergunta simples de um só domínio: sem crítico e formatação por template
+        if not analysis.get("is_complex") and n == 1:
+            plan.append({
+                "step": n + 1,
+                "agent": "TemplateResponseAgent",
+                "domain": "response",
+                "task": "Formatar resposta direta do subagente",
+                "status": "pending",
+            })
+            return plan
+
+        plan += [
+            {
+                "step": n + 1,
+                "agent": "CriticAgent",
+                "domain": "validation",
+                "task": "Validar consistência e completude das respostas",
+                "status": "pending",
+            },
+            {
+                "step": n + 2,
+                "agent": "ResponseAgent",
+                "domain": "response",
+                "task": "Formatar resposta final para o usuário",
+                "status": "pending",
+            },
+        ]
 
         return plan
 
@@ -205,6 +284,24 @@ Responda SOMENTE com um JSON válido:
 
         analysis = self.analyze_query(query)
         plan = self.create_plan(query, analysis)
+        if self.session:
+            self.session.log_plan(plan)
+
+        return {
+            "query": query,
+            "analysis": analysis,
+            "plan": plan,
+        }
+
+    async def ainvoke(self, query: str) -> dict[str, Any]:
+        """Versão assíncrona de invoke."""
+        if self.session:
+            self.session.log_agent_call(self.config.name, query)
+
+        analysis = await self.aanalyze_query(query)
+        plan = self.create_plan(query, analysis)
+        if self.session:
+            self.session.log_plan(plan)
 
         return {
             "query": query,
@@ -3,13 +3,42 @@ Agente de Resposta (ResponseAgent).
 Formata a resposta final para o usuário de forma clara e rastreável.
 """
 
+import string
+from collections.abc import AsyncIterator
 from typing import Any
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 
 from app.config.agents import RESPONSE_AGENT_CONFIG
+from app.config.http_clients import get_http_client
 from app.governance.logging import SessionContext
+from app.orchestration.llm_cache import cached_ainvoke, cached_invoke
+
+# Clientes compartilhados por (modelo, temperatura): reaproveita pool HTTP e TLS
+_LLM_CACHE: dict[tuple[str, float], ChatOpenAI] = {}
+
+_FORMAT_TEMPLATE = string.Template("""Com base nas informações abaixo, crie uma resposta final clara e completa para o usuário.
+
+Pergunta original: $query
+
+Plano de execução:
+$plan_text
+
+Respostas dos subagentes:
+$responses_text
+
+Validação:
+- Completude: $completeness_score%
+- Resumo: $summary
+
+Crie uma resposta que:
+1. Responda diretamente à pergunta do usuário
+2. Seja clara e bem estruturada
+3. Inclua os dados relevantes encontrados
+4. Mencione as fontes consultadas quando apropriado
+
+Resposta:""")
 
 
 class ResponseAgent:
@@ -21,6 +50,7 @@ class ResponseAgent:
         model_name: str = "gpt-4o-mini",
     ):
         self.config = RESPONSE_AGENT_CONFIG
+        self._system_message = SystemMessage(content=self.config.system_prompt)
         self.session = session
         self.model_name = model_name
         self._llm = None
@@ -29,10 +59,14 @@ class ResponseAgent:
     def llm(self) -> ChatOpenAI:
         """Retorna instância do LLM lazy-loaded."""
         if self._llm is None:
-            self._llm = ChatOpenAI(
-                model=self.model_name,
-                temperature=0.3,
-            )
+            key = (self.model_name, 0.3)
+            if key not in _LLM_CACHE:
+                _LLM_CACHE[key] = ChatOpenAI(
+                    model=self.model_name,
+                    temperature=0.3,
+                    http_client=get_http_client(),
+                )
+            self._llm = _LLM_CACHE[key]
         return self._llm
 
     def format_response(
@@ -54,56 +88,108 @@ class ResponseAgent:
         Returns:
             Dicionário com resposta formatada e metadados
         """
-        if self.session:
-            self.session.log_agent_call(self.config.name, "Formatando resposta final")
+        messages, sources, plan_summary = self._format_messages(query, responses, plan, validation)
+        response = cached_invoke(self.llm, messages, self.session)
+        return self._build_result(query, sources, plan_summary, validation, response.content)
 
-        responses_text = "\n\n".join([
-            f"**{r.get('agent', 'Unknown')}**:\n{r.get('response', 'Sem resposta')}"
-            for r in responses
-            if r.get("success", True)
-        ])
+    async def aformat_response(
+        self,
+        query: str,
+        responses: list[dict[str, Any]],
+        plan: list[dict[str, Any]],
+        validation: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Versão assíncrona de format_response."""
+        messages, sources, plan_summary = self._format_messages(query, responses, plan, validation)
+        response = await cached_ainvoke(self.llm, messages, self.session)
+        return self._build_result(query, sources, plan_summary, validation, response.content)
 
-        plan_text = "\n".join([
-            f"{step['step']}. {step['agent']}: {step['task']}"
-            for step in plan
-        ])
+    async def astream_response(
+        self,
+        query: str,
+        responses: list[dict[str, Any]],
+        plan: list[dict[str, Any]],
+        validation: dict[str, Any],
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Formata a resposta emitindo os tokens conforme são gerados.
 
-        format_prompt = f"""Com base nas informações abaixo, crie uma resposta final clara e completa para o usuário.
+        Yields:
+            {"type": "token", "content": str} para cada chunk e, ao final,
+            {"type": "result", "result": dict} com o mesmo formato de format_response
+        """
+        messages, sources, plan_summary = self._format_messages(query, responses, plan, validation)
+        chunks: list[str] = []
+        async for chunk in self.llm.astream(messages):
+            content = chunk.content
+            if content:
+                chunks.append(content)
+                yield {"type": "token", "content": content}
 
-Pergunta original: {query}
+        yield {
+            "type": "result",
+            "result": self._build_result(query, sources, plan_summary, validation, "".join(chunks)),
+        }
 
-Plano de execução:
-{plan_text}
+    def _format_messages(
+        self,
+        query: str,
+        responses: list[dict[str, Any]],
+        plan: list[dict[str, Any]],
+        validation: dict[str, Any],
+    ) -> tuple[list, list[str], list[str]]:
+        """
+        Monta as mensagens de formatação da resposta final.
 
-Respostas dos subagentes:
-{responses_text}
+        Returns:
+            (mensagens, fontes, resumo do plano): respostas e plano são
+            percorridos uma única vez cada
+        """
+        if self.session:
+            self.session.log_agent_call(self.config.name, "Formatando resposta final")
 
-Validação:
-- Completude: {validation.get('completeness_score', 'N/A')}%
-- Resumo: {validation.get('summary', 'N/A')}
+        parts: list[str] = []
+        sources: list[str] = []
+        for r in responses:
+            if not r.get("success", True):
+                continue
+            agent = r.get("agent", "Unknown")
+            parts.append(f"**{agent}**:\n{r.get('response', 'Sem resposta')}")
+            sources.append(agent)
 
-Crie uma resposta que:
-1. Responda diretamente à pergunta do usuário
-2. Seja clara e bem estruturada
-3. Inclua os dados relevantes encontrados
-4. Mencione as fontes consultadas quando apropriado
+        plan_lines: list[str] = []
+        plan_summary: list[str] = []
+        for step in plan:
+            plan_lines.append(f"{step['step']}. {step['agent']}: {step['task']}")
+            plan_summary.append(step["task"])
 
-Resposta:"""
+        format_prompt = _FORMAT_TEMPLATE.substitute(
+            query=query,
+            plan_text="\n".join(plan_lines),
+            responses_text="\n\n".join(parts),
+            completeness_score=validation.get("completeness_score", "N/A"),
+            summary=validation.get("summary", "N/A"),
+        )
 
         messages = [
-            SystemMessage(content=self.config.system_prompt),
+            self._system_message,
             HumanMessage(content=format_prompt),
         ]
+        return messages, sources, plan_summary
 
-        response = self.llm.invoke(messages)
-        formatted_response = response.content
-
-        sources = [r.get("agent", "Unknown") for r in responses if r.get("success", True)]
-
+    def _build_result(
+        self,
+        query: str,
+        sources: list[str],
+        plan_summary: list[str],
+        validation: dict[str, Any],
+        formatted_response: str,
+    ) -> dict[str, Any]:
+        """Consolida a resposta formatada com os metadados."""
         result = {
             "response": formatted_response,
             "sources": sources,
-            "plan_summary": [step["task"] for step in plan],
+            "plan_summary": plan_summary,
             "validation_score": validation.get("completeness_score", 0),
             "query": query,
         }
@@ -134,7 +220,77 @@ Resposta:"""
         """
         return self.format_response(query, responses, plan, validation)
 
+    async def ainvoke(
+        self,
+        query: str,
+        responses: list[dict[str, Any]],
+        plan: list[dict[str, Any]],
+        validation: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Versão assíncrona de invoke."""
+        return await self.aformat_response(query, responses, plan, validation)
+
 
 def create_response_agent(session: SessionContext | None = None) -> ResponseAgent:
     """Factory function para criar ResponseAgent."""
     return ResponseAgent(session=session)
+
+
+class TemplateResponseAgent:
+    """
+    Formatação sem LLM para planos de um único domínio.
+
+    A resposta do subagente já é a resposta final: dispensa o crítico e a
+    reescrita pelo ResponseAgent.
+    """
+
+    def __init__(self, session: SessionContext | None = None):
+        self.session = session
+
+    def format_response(
+        self,
+        query: str,
+        responses: list[dict[str, Any]],
+        plan: list[dict[str, Any]],
+    ) -> dict[str, Any]:
+        """
+        Monta a resposta final diretamente das respostas dos subagentes.
+
+        Args:
+            query: Pergunta original do usuário
+            responses: Respostas dos subagentes
+            plan: Plano de execução
+
+        Returns:
+            Dicionário no mesmo formato de ResponseAgent.format_response
+        """
+        parts: list[str] = []
+        sources: list[str] = []
+        for r in responses:
+            if not r.get("success", True):
+                continue
+            agent = r.get("agent", "Unknown")
+            parts.append(f"**{agent}**: {r.get('response', 'Sem resposta')}")
+            sources.append(agent)
+
+        if parts:
+            formatted_response = "\n\n".join(parts) + f"\n\nFontes: {', '.join(sources)}"
+        else:
+            formatted_response = "Não foi possível obter dados para responder à pergunta."
+
+        if self.session:
+            self.session.log_response(formatted_response, sources)
+
+        return {
+            "response": formatted_response,
+            "sources": sources,
+            "plan_summary": [step["task"] for step in plan],
+            # Sem passagem pelo crítico
+            "validation_score": None,
+            "query": query,
+        }
+
+
+def create_template_response_agent(session: SessionContext | None = None) -> TemplateResponseAgent:
+    """Factory function para criar TemplateResponseAgent."""
+    return TemplateResponseAgent(session=session)
@@ -3,12 +3,117 @@ Ferramentas de integracao com Databricks para os agentes.
 Implementa ferramentas para consulta de dados e exploracao do Unity Catalog.
 """
 
+import atexit
+import logging
 import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from typing import Any
 
 from langchain_core.tools import tool
 
-from app.db_connection.connection import get_db_connection
+from app.db_connection.connection import PYARROW_AVAILABLE, get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Separadores dos textos formatados (montados uma vez)
+_SEP = "-" * 50 + "\n"
+_SECTION_SEP = "-" * 40 + "\n"
+_TITLE_SEP = "=" * 60 + "\n\n"
+
+# Schemas pedidos assim que o plano é conhecido: o DESCRIBE roda enquanto o
+# subagente ainda aguarda o LLM e aquece o cache de schemas da conexão, que
+# describe_table consulta depois (respeitando o TTL do cache).
+# O mesmo pool roda consultas independentes de uma ferramenta em paralelo.
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="schema-prefetch")
+atexit.register(_PREFETCH_EXECUTOR.shutdown, wait=False)
+# Somente tabelas com DESCRIBE em andamento: evita disparos duplicados
+_PREFETCH_IN_FLIGHT: set[str] = set()
+_PREFETCH_LOCK = threading.Lock()
+
+
+def _on_prefetch_done(table_name: str, future: Future) -> None:
+    with _PREFETCH_LOCK:
+        _PREFETCH_IN_FLIGHT.discard(table_name)
+    if not future.cancelled() and future.exception():
+        logger.warning("Schema prefetch failed for %s: %s", table_name, future.exception())
+
+
+def prefetch_table_schemas(tables: list[str]) -> None:
+    """
+    Dispara em segundo plano o DESCRIBE das tabelas informadas.
+
+    Args:
+        tables: Nomes das tabelas cujo schema provavelmente será consultado
+    """
+    db = get_db_connection()
+    with _PREFETCH_LOCK:
+        pending = [name for name in dict.fromkeys(tables) if name not in _PREFETCH_IN_FLIGHT]
+        _PREFETCH_IN_FLIGHT.update(pending)
+
+    for table_name in pending:
+        future = _PREFETCH_EXECUTOR.submit(db.get_table_schema, table_name)
+        future.add_done_callback(partial(_on_prefetch_done, table_name))
+
+
+# Listagem de tabelas por (catálogo, schema), reaproveitada por alguns segundos
+TABLES_CACHE_TTL_SECONDS = int(os.environ.get("TABLES_CACHE_TTL_SECONDS", "60"))
+_TABLES_CACHE: dict[tuple[str, str], tuple[float, list[dict[str, Any]]]] = {}
+
+# Texto SQL fixo: o termo vai como parâmetro, então o plano da query é reaproveitado
+_SEARCH_TABLES_SQL = """
+SELECT table_name, table_type, comment
+FROM {catalog}.information_schema.tables
+WHERE table_schema = :schema
+AND (
+    LOWER(table_name) LIKE LOWER(:pattern)
+    OR LOWER(comment) LIKE LOWER(:pattern)
+)
+LIMIT 20
+"""
+
+
+def _list_tables(catalog: str, schema: str) -> list[dict[str, Any]]:
+    """Retorna o SHOW TABLES do schema, usando o cache enquanto não expirar."""
+    key = (catalog, schema)
+    cached = _TABLES_CACHE.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    tables = get_db_connection().execute_query(f"SHOW TABLES IN {catalog}.{schema}")
+    _TABLES_CACHE[key] = (time.monotonic() + TABLES_CACHE_TTL_SECONDS, tables)
+    return tables
+
+
+# Linhas de run_sql enviadas ao LLM; o total continua informado no cabeçalho
+RUN_SQL_MAX_ROWS = 200
+
+
+def _format_arrow_results(table: Any) -> str:
+    """Formata o resultado colunar: corta antes de converter e formata em C (pandas)."""
+    if table.num_rows == 0:
+        return "Query executada com sucesso. Nenhum resultado retornado."
+
+    parts = [
+        f"Resultados da query ({table.num_rows} linhas):\n",
+        _SEP,
+        table.slice(0, RUN_SQL_MAX_ROWS).to_pandas().to_string(index=False),
+        "\n",
+    ]
+    if table.num_rows > RUN_SQL_MAX_ROWS:
+        parts.append(f"... e mais {table.num_rows - RUN_SQL_MAX_ROWS} linhas\n")
+    return "".join(parts)
+
+
+def _append_rows(parts: list[str], rows: list[dict[str, Any]]) -> None:
+    """Acrescenta as linhas numeradas (chave: valor) ao texto em construção."""
+    for i, row in enumerate(rows, 1):
+        parts.append(f"Linha {i}:\n")
+        parts.extend([f"  {key}: {value}\n" for key, value in row.items()])
+        parts.append("\n")
 
 
 @tool
@@ -26,12 +131,11 @@ def list_catalogs() -> str:
         if not results:
             return "Nenhum catalogo encontrado."
 
-        result = "Catalogos disponiveis no Unity Catalog:\n"
-        result += "-" * 50 + "\n"
+        parts = ["Catalogos disponiveis no Unity Catalog:\n", _SEP]
         for row in results:
             catalog_name = row.get("catalog", row.get("catalog_name", str(row)))
-            result += f"  - {catalog_name}\n"
-        return result
+            parts.append(f"  - {catalog_name}\n")
+        return "".join(parts)
     except Exception as e:
         return f"Erro ao listar catalogos: {e}"
 
@@ -55,12 +159,11 @@ def list_schemas(catalog_name: str | None = None) -> str:
         if not results:
             return f"Nenhum schema encontrado no catalogo '{catalog}'."
 
-        result = f"Schemas no catalogo '{catalog}':\n"
-        result += "-" * 50 + "\n"
+        parts = [f"Schemas no catalogo '{catalog}':\n", _SEP]
         for row in results:
             schema_name = row.get("databaseName", row.get("schema_name", str(row)))
-            result += f"  - {schema_name}\n"
-        return result
+            parts.append(f"  - {schema_name}\n")
+        return "".join(parts)
     except Exception as e:
         return f"Erro ao listar schemas: {e}"
 
@@ -78,22 +181,19 @@ def list_tables(catalog_name: str | None = None, schema_name: str | None = None)
         String formatada com lista de tabelas
     """
     try:
-        db = get_db_connection()
         catalog = catalog_name or os.getenv("DATABRICKS_CATALOG", "main")
         schema = schema_name or os.getenv("DATABRICKS_SCHEMA", "default")
-        query = f"SHOW TABLES IN {catalog}.{schema}"
-        results = db.execute_query(query)
+        results = _list_tables(catalog, schema)
         if not results:
             return f"Nenhuma tabela encontrada em '{catalog}.{schema}'."
 
-        result = f"Tabelas em '{catalog}.{schema}':\n"
-        result += "-" * 50 + "\n"
+        parts = [f"Tabelas em '{catalog}.{schema}':\n", _SEP]
         for row in results:
             table_name = row.get("tableName", row.get("table_name", str(row)))
             is_temp = row.get("isTemporary", False)
             table_type = " (temporaria)" if is_temp else ""
-            result += f"  - {table_name}{table_type}\n"
-        return result
+            parts.append(f"  - {table_name}{table_type}\n")
+        return "".join(parts)
     except Exception as e:
         return f"Erro ao listar tabelas: {e}"
 
@@ -113,44 +213,48 @@ def explain_table(table_name: str) -> str:
     try:
         db = get_db_connection()
 
+        # Amostra e schema em paralelo: dois round-trips ao warehouse viram um
+        sample_future = _PREFETCH_EXECUTOR.submit(db.get_sample_data, table_name, 3)
         schema = db.get_table_schema(table_name)
         if not schema:
+            sample_future.cancel()
             return f"Tabela '{table_name}' nao encontrada."
 
-        result = f"Explicacao da tabela '{table_name}':\n"
-        result += "=" * 60 + "\n\n"
-
-        result += "ESTRUTURA DA TABELA:\n"
-        result += "-" * 40 + "\n"
+        parts = [
+            f"Explicacao da tabela '{table_name}':\n",
+            _TITLE_SEP,
+            "ESTRUTURA DA TABELA:\n",
+            _SECTION_SEP,
+        ]
         for col in schema:
             col_name = col.get("col_name", "")
             data_type = col.get("data_type", "")
             comment = col.get("comment", "")
             if col_name and not col_name.startswith("#"):
-                result += f"  {col_name}:\n"
-                result += f"    Tipo: {data_type}\n"
+                parts.append(f"  {col_name}:\n")
+                parts.append(f"    Tipo: {data_type}\n")
                 if comment:
-                    result += f"    Descricao: {comment}\n"
-                result += "\n"
+                    parts.append(f"    Descricao: {comment}\n")
+                parts.append("\n")
 
-        result += "\nEXEMPLO DE DADOS (3 primeiras linhas):\n"
-        result += "-" * 40 + "\n"
+        parts.append("\nEXEMPLO DE DADOS (3 primeiras linhas):\n")
+        parts.append(_SECTION_SEP)
         try:
-            sample = db.get_sample_data(table_name, 3)
+            sample = sample_future.result()
             if sample:
                 for i, row in enumerate(sample, 1):
-                    result += f"  Registro {i}:\n"
+                    parts.append(f"  Registro {i}:\n")
                     for key, value in list(row.items())[:5]:
-                        result += f"    {key}: {value}\n"
+                        parts.append(f"    {key}: {value}\n")
                     if len(row) > 5:
-                        result += f"    ... e mais {len(row) - 5} campos\n"
-                    result += "\n"
+                        parts.append(f"    ... e mais {len(row) - 5} campos\n")
+                    parts.append("\n")
             else:
-                result += "  (tabela vazia ou sem permissao de leitura)\n"
+                parts.append("  (tabela vazia ou sem permissao de leitura)\n")
         except Exception:
-            result += "  (nao foi possivel obter amostra de dados)\n"
+            parts.append("  (nao foi possivel obter amostra de dados)\n")
 
-        return result
+        return "".join(parts)
     except Exception as e:
         return f"Erro ao explicar tabela '{table_name}': {e}"
 
@@ -171,40 +275,27 @@ def search_tables(search_term: str) -> str:
         catalog = os.getenv("DATABRICKS_CATALOG", "main")
         schema = os.getenv("DATABRICKS_SCHEMA", "default")
 
-        query = f"""
-        SELECT table_name, table_type, comment
-        FROM {catalog}.information_schema.tables
-        WHERE table_schema = '{schema}'
-        AND (
-            LOWER(table_name) LIKE LOWER('%{search_term}%')
-            OR LOWER(comment) LIKE LOWER('%{search_term}%')
+        results = db.execute_query(
+            _SEARCH_TABLES_SQL.format(catalog=catalog),
+            {"schema": schema, "pattern": f"%{search_term}%"},
         )
-        LIMIT 20
-        """
-        results = db.execute_query(query)
 
         if not results:
-            query_fallback = f"SHOW TABLES IN {catalog}.{schema}"
-            all_tables = db.execute_query(query_fallback)
-            search_lower = search_term.lower()
+            pattern = re.compile(re.escape(search_term), re.IGNORECASE)
             results = [
-                t for t in all_tables
-                if search_lower in str(t.get("tableName", "")).lower()
+                t for t in _list_tables(catalog, schema)
+                if pattern.search(str(t.get("tableName", "")))
             ]
 
         if not results:
             return f"Nenhuma tabela encontrada com o termo '{search_term}'."
 
-        result = f"Tabelas encontradas para '{search_term}':\n"
-        result += "-" * 50 + "\n"
+        parts = [f"Tabelas encontradas para '{search_term}':\n", _SEP]
         for row in results:
             table_name = row.get("table_name", row.get("tableName", str(row)))
             comment = row.get("comment", "")
-            result += f"  - {table_name}"
-            if comment:
-                result += f": {comment}"
-            result += "\n"
-        return result
+            parts.append(f"  - {table_name}: {comment}\n" if comment else f"  - {table_name}\n")
+        return "".join(parts)
     except Exception as e:
         return f"Erro ao buscar tabelas: {e}"
 
@@ -221,22 +312,19 @@ def describe_table(table_name: str) -> str:
         String formatada com informações das colunas
     """
     try:
-        db = get_db_connection()
-        schema = db.get_table_schema(table_name)
+        schema = get_db_connection().get_table_schema(table_name)
         if not schema:
             return f"Tabela '{table_name}' não encontrada ou sem colunas."
 
-        result = f"Schema da tabela '{table_name}':\n"
-        result += "-" * 50 + "\n"
+        parts = [f"Schema da tabela '{table_name}':\n", _SEP]
         for col in schema:
             col_name = col.get("col_name", "")
             data_type = col.get("data_type", "")
             comment = col.get("comment", "")
-            result += f"  - {col_name}: {data_type}"
-            if comment:
-                result += f" ({comment})"
-            result += "\n"
-        return result
+            parts.append(
+                f"  - {col_name}: {data_type} ({comment})\n" if comment else f"  - {col_name}: {data_type}\n"
+            )
+        return "".join(parts)
     except Exception as e:
         return f"Erro ao descrever tabela '{table_name}': {e}"
 
@@ -259,14 +347,9 @@ def sample_data(table_name: str, limit: int = 5) -> str:
         if not data:
             return f"Tabela '{table_name}' está vazia ou não encontrada."
 
-        result = f"Amostra de dados da tabela '{table_name}' ({len(data)} linhas):\n"
-        result += "-" * 50 + "\n"
-        for i, row in enumerate(data, 1):
-            result += f"Linha {i}:\n"
-            for key, value in row.items():
-                result += f"  {key}: {value}\n"
-            result += "\n"
-        return result
+        parts = [f"Amostra de dados da tabela '{table_name}' ({len(data)} linhas):\n", _SEP]
+        _append_rows(parts, data)
+        return "".join(parts)
     except Exception as e:
         return f"Erro ao obter amostra de '{table_name}': {e}"
 
@@ -284,18 +367,16 @@ def run_sql(query: str) -> str:
     """
     try:
         db = get_db_connection()
+        if PYARROW_AVAILABLE:
+            return _format_arrow_results(db.execute_query_arrow(query))
+
         results = db.execute_query(query)
         if not results:
             return "Query executada com sucesso. Nenhum resultado retornado."
 
-        result = f"Resultados da query ({len(results)} linhas):\n"
-        result += "-" * 50 + "\n"
-        for i, row in enumerate(results, 1):
-            result += f"Linha {i}:\n"
-            for key, value in row.items():
-                result += f"  {key}: {value}\n"
-            result += "\n"
-        return result
+        parts = [f"Resultados da query ({len(results)} linhas):\n", _SEP]
+        _append_rows(parts, results)
+        return "".join(parts)
     except Exception as e:
         return f"Erro ao executar query: {e}"
 
@@ -312,22 +393,19 @@ def get_metadata(table_name: str) -> str:
         String formatada com metadados da tabela
     """
     try:
-        db = get_db_connection()
-        query = f"DESCRIBE EXTENDED {table_name}"
-        metadata = db.execute_query(query)
+        metadata = get_db_connection().get_table_metadata(table_name)
         if not metadata:
             return f"Metadados não encontrados para '{table_name}'."
 
-        result = f"Metadados da tabela '{table_name}':\n"
-        result += "-" * 50 + "\n"
+        parts = [f"Metadados da tabela '{table_name}':\n", _SEP]
         for item in metadata:
             col_name = item.get("col_name", "")
             data_type = item.get("data_type", "")
             if col_name and data_type:
-                result += f"  {col_name}: {data_type}\n"
+                parts.append(f"  {col_name}: {data_type}\n")
             elif col_name:
-                result += f"  {col_name}\n"
-        return result
+                parts.append(f"  {col_name}\n")
+        return "".join(parts)
     except Exception as e:
         return f"Erro ao obter metadados de '{table_name}': {e}"
 
@@ -347,6 +425,8 @@ DATA_QUERY_TOOLS = [
     get_metadata,
 ]
 
+ALL_TOOLS = CATALOG_EXPLORATION_TOOLS + DATA_QUERY_TOOLS
+
 
 def get_tools_for_theme(theme: str) -> list:
     """
@@ -359,7 +439,7 @@ def get_tools_for_theme(theme: str) -> list:
         Lista de ferramentas LangChain
     """
     if theme and theme.lower() == "sql":
-        return CATALOG_EXPLORATION_TOOLS + DATA_QUERY_TOOLS
+        return ALL_TOOLS
     return DATA_QUERY_TOOLS
 
 
@@ -375,7 +455,7 @@ def get_sql_tools() -> list:
 
 def get_all_tools() -> list:
     """Retorna todas as ferramentas disponiveis."""
-    return CATALOG_EXPLORATION_TOOLS + DATA_QUERY_TOOLS
+    return ALL_TOOLS
 
 
 def format_tool_results(results: list[dict[str, Any]]) -> str:
@@ -0,0 +1,9 @@
+"""Utilitários sem dependência das demais camadas da aplicação."""
+
+from app.utils.serialization import dumps, dumps_sorted, loads
+
+__all__ = [
+    "dumps",
+    "dumps_sorted",
+    "loads",
+]
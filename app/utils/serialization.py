@@ -0,0 +1,47 @@
+"""
+Serialização JSON compartilhada pelas camadas da plataforma.
+
+Usa orjson quando disponível e, caso contrário, o json da stdlib. As
+saídas são sempre texto UTF-8 sem escape de caracteres não-ASCII.
+"""
+
+import json
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson not installed. Using stdlib json.")
+
+if ORJSON_AVAILABLE:
+    loads = orjson.loads
+
+    def dumps(obj: Any) -> str:
+        """Serializa em JSON UTF-8 (orjson não escapa caracteres não-ASCII)."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, default=str).decode("utf-8")
+
+    def dumps_sorted(obj: Any) -> str:
+        """Serializa com chaves ordenadas (uso em chaves de cache)."""
+        return orjson.dumps(
+            obj,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            default=str,
+        ).decode("utf-8")
+
+else:
+    loads = json.loads
+
+    def dumps(obj: Any) -> str:
+        """Serializa em JSON UTF-8 (orjson não escapa caracteres não-ASCII)."""
+        return json.dumps(obj, ensure_ascii=False, default=str)
+
+    def dumps_sorted(obj: Any) -> str:
+        """Serializa com chaves ordenadas (uso em chaves de cache)."""
+        return json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
@@ -13,6 +13,8 @@ Pré-requisitos:
 - .env com DATABRICKS_HOST e DATABRICKS_TOKEN
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 from databricks.sdk import WorkspaceClient
 from dotenv import load_dotenv
 import os
@@ -50,46 +52,53 @@ def main():
     except Exception as e:
         fail(f"Erro de autenticação: {e}")
 
-    # 1️⃣ Workspace
-    try:
-        me = client.current_user.me()
-        success(f"Usuário autenticado: {me.user_name}")
-    except Exception as e:
-        fail(f"Erro ao acessar usuário atual: {e}")
-
-    # 2️⃣ Unity Catalog – listar catálogos
-    print("\n📚 Testando Unity Catalog...")
-    try:
-        catalogs = list(client.catalogs.list())
-        if not catalogs:
-            fail("Nenhum catálogo encontrado (permissão insuficiente?)")
-
-        success(f"{len(catalogs)} catálogos encontrados")
-        for c in catalogs[:5]:
-            print(f"   - {c.name}")
-    except Exception as e:
-        fail(f"Erro ao acessar Unity Catalog: {e}")
-
-    # 3️⃣ Schemas (opcional, apenas 1 catálogo)
-    try:
-        catalog_name = catalogs[0].name
-        schemas = list(client.schemas.list(catalog_name=catalog_name))
-        success(f"{len(schemas)} schemas no catálogo '{catalog_name}'")
-    except Exception as e:
-        fail(f"Erro ao listar schemas: {e}")
-
-    # 4️⃣ Model Serving Endpoints
-    print("\n🤖 Testando Model Serving...")
-    try:
-        endpoints = list(client.serving_endpoints.list())
-        if not endpoints:
-            print("⚠️ Nenhum Model Serving Endpoint encontrado")
-        else:
-            success(f"{len(endpoints)} endpoints encontrados")
-            for ep in endpoints:
-                print(f"   - {ep.name}")
-    except Exception as e:
-        fail(f"Erro ao listar Model Serving Endpoints: {e}")
+    # Chamadas independentes ao mesmo host: disparadas juntas, o tempo total
+    # é o da mais lenta em vez da soma dos round-trips
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        me_future = executor.submit(client.current_user.me)
+        catalogs_future = executor.submit(lambda: list(client.catalogs.list()))
+        endpoints_future = executor.submit(lambda: list(client.serving_endpoints.list()))
+
+        # 1️⃣ Workspace
+        try:
+            me = me_future.result()
+            success(f"Usuário autenticado: {me.user_name}")
+        except Exception as e:
+            fail(f"Erro ao acessar usuário atual: {e}")
+
+        # 2️⃣ Unity Catalog – listar catálogos
+        print("\n📚 Testando Unity Catalog...")
+        try:
+            catalogs = catalogs_future.result()
+            if not catalogs:
+                fail("Nenhum catálogo encontrado (permissão insuficiente?)")
+
+            success(f"{len(catalogs)} catálogos encontrados")
+            for c in catalogs[:5]:
+                print(f"   - {c.name}")
+        except Exception as e:
+            fail(f"Erro ao acessar Unity Catalog: {e}")
+
+        # 3️⃣ Schemas (opcional, apenas 1 catálogo) – depende dos catálogos
+        try:
+            catalog_name = catalogs[0].name
+            schemas = list(client.schemas.list(catalog_name=catalog_name))
+            success(f"{len(schemas)} schemas no catálogo '{catalog_name}'")
+        except Exception as e:
+            fail(f"Erro ao listar schemas: {e}")
+
+        # 4️⃣ Model Serving Endpoints
+        print("\n🤖 Testando Model Serving...")
+        try:
+            endpoints = endpoints_future.result()
+            if not endpoints:
+                print("⚠️ Nenhum Model Serving Endpoint encontrado")
+            else:
+                success(f"{len(endpoints)} endpoints encontrados")
+                for ep in endpoints:
+                    print(f"   - {ep.name}")
+        except Exception as e:
+            fail(f"Erro ao listar Model Serving Endpoints: {e}")
 
     print("\n🎉 CONCLUSÃO")
     print("Você tem acesso funcional ao Databricks:")